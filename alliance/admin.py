@@ -1,9 +1,11 @@
 from django.contrib import admin
-from .models import MemberProfile, Caste, Koottam, FamilyDetail, Rasi, Star, BirthDetail, Education, Profession, ProfessionalDetail, Dhosam, ProfilePhoto, Notification
+from . import search
+from .models import MemberProfile, Caste, Koottam, FamilyDetail, Rasi, Star, BirthDetail, Education, Profession, ProfessionalDetail, Dhosam, ProfilePhoto, Notification, Job, SavedSearch, MutualInterest
 # Register ProfilePhoto model
 @admin.register(ProfilePhoto)
 class ProfilePhotoAdmin(admin.ModelAdmin):
-    list_display = ('profile', 'is_primary', 'uploaded_at')
+    list_display = ('profile', 'is_primary', 'status', 'uploaded_at')
+    list_filter = ('status',)
     readonly_fields = ('uploaded_at',)
 
 # Customize admin site text
@@ -13,9 +15,24 @@ admin.site.index_title = "Pavalavart Administration"
 
 @admin.register(MemberProfile)
 class MemberProfileAdmin(admin.ModelAdmin):
-    list_display = ('__str__', 'mobile', 'gender', 'created_at')
-    search_fields = ('mobile', 'user__first_name', 'user__last_name')
-    list_filter = ('gender',)
+    list_display = ('__str__', 'mobile', 'gender', 'is_complete', 'created_at')
+    search_fields = ('^mobile', 'user__first_name', 'user__last_name')
+    search_help_text = 'Name, mobile, caste/koottam or place of birth'
+    list_filter = ('gender', 'is_complete')
+
+    def get_search_results(self, request, queryset, search_term):
+        # served by the trigram search index (alliance.search); terms too short for it use search_fields
+        if not search.search_terms(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        results = search.search_profiles(queryset, search_term)
+        term = search_term.strip()
+        if term.isdigit():
+            # the index only holds the last mobile digits; a full number or its leading digits use the mobile index
+            if len(term) == 10:
+                results = results | queryset.filter(mobile=term)
+            else:
+                results = results | queryset.filter(mobile__startswith=term)
+        return results, False
 
 @admin.register(Caste)
 class CasteAdmin(admin.ModelAdmin):
@@ -68,6 +85,33 @@ class DhosamAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'message', 'message_ta', 'created_at')
+    list_display = ('title', 'message', 'message_ta', 'is_targeted', 'delivery_status', 'recipient_count', 'created_at')
+    list_filter = ('is_targeted', 'delivery_status')
+    readonly_fields = ('is_targeted', 'delivery_status', 'recipient_count', 'created_at', 'published_at')
+    fieldsets = (
+        (None, {'fields': ('title', 'message', 'message_ta')}),
+        ('Audience', {
+            'description': 'Leave empty to notify every member. Targeted notifications are delivered in the background.',
+            'fields': ('target_gender', 'target_caste', 'target_incomplete', 'target_registered_before'),
+        }),
+        ('Delivery', {'fields': ('is_targeted', 'delivery_status', 'recipient_count', 'created_at', 'published_at')}),
+    )
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created_at', 'updated_at')
 
 # Register your models here.
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'member', 'seen_until', 'created_at')
+    search_fields = ('name', 'member__user__first_name', 'member__user__last_name')
+
+
+@admin.register(MutualInterest)
+class MutualInterestAdmin(admin.ModelAdmin):
+    list_display = ('member', 'match', 'created_at')
+    readonly_fields = ('created_at',)
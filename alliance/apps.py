@@ -8,3 +8,5 @@ class AllianceConfig(AppConfig):
     def ready(self):
         # register signal handlers
         import alliance.signals  
+        # build the porutham score matrices once at startup
+        import alliance.porutham
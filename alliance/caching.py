@@ -0,0 +1,148 @@
+"""Cached copies of rarely-changing data used by the views.
+
+Reference tables (caste, koottam, rasi, star, dhosam, education, profession)
+are cached under a version number kept in the Django cache. Saving or deleting
+any of them (e.g. from the admin) bumps the version through alliance.signals,
+so every process reloads them on its next request.
+
+Rendered profile_detail bodies are cached per profile under a key built from
+MemberProfile.updated_at (bumped on any profile, detail, user or photo change)
+and the reference version, so stale entries are never read and simply expire.
+
+Each member's shortlisted profile ids are cached as one set, dropped by the
+shortlist views whenever the member adds or removes a favorite.
+
+Porutham rankings of the matches page are cached per viewer and search
+filters for a few minutes: the first page always re-ranks, later pages read
+the cached ranking, so deep pages do not score every candidate again.
+
+Unread notification counts are cached per member under the member's
+notifications_seen_at and a notifications version that alliance.signals bumps
+whenever a Notification is saved or deleted.
+
+Everything here lives in the default cache (DJANGO_CACHE_URL in settings),
+the same tier that holds sessions; with several worker processes it has to be
+a shared one for the version bumps and invalidations to reach every worker.
+
+The loads that fill these entries always read the primary database: a GET
+routed to a lagging replica (alliance.routers) right after an invalidation
+would otherwise cache pre-change rows under the new version.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Caste, Koottam, Rasi, Star, Dhosam, Education, Profession, Shortlist, Notification
+
+REFERENCE_VERSION_KEY = 'alliance:reference:version'
+NOTIFICATIONS_VERSION_KEY = 'alliance:notifications:version'
+PROFILE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+SHORTLIST_TIMEOUT = 60 * 60 * 24
+UNREAD_COUNT_TIMEOUT = 60 * 60
+MATCH_RANKING_TIMEOUT = 60 * 5
+
+# in-process copy of the last loaded (version, data), avoids unpickling on every request
+_reference_local = (None, None)
+
+
+def _load_reference_data():
+    db = DEFAULT_DB_ALIAS
+    return {
+        'castes': list(Caste.objects.using(db)),
+        'koottams': list(Koottam.objects.using(db).select_related('caste')),
+        'rasis': list(Rasi.objects.using(db)),
+        'stars': list(Star.objects.using(db).select_related('rasi')),
+        'dhosams': list(Dhosam.objects.using(db)),
+        'educations': list(Education.objects.using(db)),
+        'professions': list(Profession.objects.using(db)),
+    }
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # start from the clock so a flushed counter never reuses an old version's key
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # counter missing (evicted or never set): the next read starts a new one
+        cache.delete(key)
+
+
+def reference_version():
+    return _version(REFERENCE_VERSION_KEY)
+
+
+def get_reference_data():
+    """Returns the dropdown lists for the profile page, loading them from the database only after a change."""
+    global _reference_local
+    version = reference_version()
+    local_version, data = _reference_local
+    if version is not None and version == local_version:
+        return data
+    key = f'alliance:reference:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = _load_reference_data()
+        cache.set(key, data, None)
+    _reference_local = (version, data)
+    return data
+
+
+def invalidate_reference_data():
+    _bump_version(REFERENCE_VERSION_KEY)
+
+
+def profile_fragment_key(pk, updated_at):
+    return f'alliance:profile_detail:{pk}:{updated_at.timestamp()}:{reference_version()}'
+
+
+def match_ranking_key(member_id, viewer_birth, criteria):
+    """Key of a member's porutham ranking for the given (star, rasi, dhosam) and partner-search criteria."""
+    filters = hashlib.md5(repr(sorted(criteria.items())).encode()).hexdigest()
+    birth = '-'.join(str(value) for value in viewer_birth)
+    return f'alliance:ranking:{member_id}:{birth}:{filters}:{reference_version()}'
+
+
+def _shortlist_key(member_id):
+    return f'alliance:shortlist:{member_id}'
+
+
+def get_shortlisted_ids(member_id):
+    """Returns the frozenset of profile ids the member has shortlisted."""
+    key = _shortlist_key(member_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Shortlist.objects.using(DEFAULT_DB_ALIAS).filter(member_id=member_id).values_list('favorite_id', flat=True))
+        cache.set(key, ids, SHORTLIST_TIMEOUT)
+    return ids
+
+
+def invalidate_shortlisted_ids(member_id):
+    cache.delete(_shortlist_key(member_id))
+
+
+def unread_notification_count(member_id, seen_at):
+    """Number of notifications published after ``seen_at`` (all of them when None), cached per member."""
+    seen_key = seen_at.timestamp() if seen_at else 0
+    key = f'alliance:notifications:unread:{member_id}:{seen_key}:{_version(NOTIFICATIONS_VERSION_KEY)}'
+    count = cache.get(key)
+    if count is None:
+        qs = Notification.objects.using(DEFAULT_DB_ALIAS).for_member(member_id)
+        if seen_at:
+            qs = qs.filter(published_at__gt=seen_at)
+        count = qs.count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def invalidate_notifications():
+    _bump_version(NOTIFICATIONS_VERSION_KEY)
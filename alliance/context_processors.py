@@ -0,0 +1,21 @@
+from django.utils.functional import SimpleLazyObject
+
+from .caching import unread_notification_count
+
+
+def notifications(request):
+    """Unread notification badge text for base.html; computed only if a template uses it."""
+    def badge():
+        user = getattr(request, 'user', None)
+        if not user or not user.is_authenticated:
+            return ''
+        try:
+            profile = user.profile
+        except AttributeError:
+            return ''
+        count = unread_notification_count(profile.pk, profile.notifications_seen_at)
+        if not count:
+            return ''
+        return '99+' if count > 99 else str(count)
+
+    return {'unread_notifications': SimpleLazyObject(badge)}
@@ -0,0 +1,178 @@
+"""Publish/subscribe channel for real-time member events.
+
+Views and signals call ``publish()`` after a change; the ``events`` SSE view
+(served through digimat/asgi.py) subscribes each open connection to the
+``broadcast`` channel and to the member's own ``member:<id>`` channel.
+
+The broker is chosen by ``settings.EVENTS_BROKER``:
+
+- ``alliance.events.InProcessBroker`` (default) fans out to the connections
+  of the current process only, so it suits a single ASGI worker. Events
+  published by ``run_worker`` (targeted notifications) cannot reach those
+  connections; processes that serve no streams call ``detach_process()``,
+  after which this broker drops and logs what they publish.
+- ``alliance.events.RedisBroker`` relays through Redis pub/sub
+  (``settings.EVENTS_REDIS_URL``) so several workers, and events published by
+  ``run_worker``, reach every connection. Needs the ``redis`` package.
+
+A broker implements ``publish(channel, event)`` and ``publish_many(channels,
+event)``, callable from sync code on any thread, and ``subscribe(channels)``,
+an async context manager yielding an ``asyncio.Queue`` of event dicts.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+BROADCAST = 'broadcast'
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def member_channel(member_id):
+    return f'member:{member_id}'
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        # set by detach_process(): nothing published in this process can reach a stream
+        self.detached = False
+        self._warned = False
+
+    def publish(self, channel, event):
+        self.publish_many([channel], event)
+
+    def publish_many(self, channels, event):
+        if self.detached:
+            if not self._warned:
+                self._warned = True
+                logger.warning(
+                    'Dropping %s events: the in-process broker cannot reach event streams served by other '
+                    'processes. Set EVENTS_BROKER to alliance.events.RedisBroker.', event.get('type')
+                )
+            return
+        with self._lock:
+            # a connection subscribed to several of the channels gets the event once
+            subscribers = set().union(*(self._subscribers.get(channel, ()) for channel in channels))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # the subscriber's event loop has closed; it unsubscribes on its way out
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscribers[channel].discard(entry)
+                    if not self._subscribers[channel]:
+                        del self._subscribers[channel]
+
+
+class RedisBroker:
+    PREFIX = 'alliance:events:'
+
+    def __init__(self, url=None):
+        self.url = url or getattr(settings, 'EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+        self._client = None
+
+    def publish(self, channel, event):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(self.PREFIX + channel, json.dumps(event))
+
+    def publish_many(self, channels, event):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        data = json.dumps(event)
+        # one round trip for the whole batch
+        pipe = self._client.pipeline(transaction=False)
+        for channel in channels:
+            pipe.publish(self.PREFIX + channel, data)
+        pipe.execute()
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[self.PREFIX + channel for channel in channels])
+        queue = asyncio.Queue()
+
+        async def relay():
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    queue.put_nowait(json.loads(message['data']))
+
+        task = asyncio.create_task(relay())
+        try:
+            yield queue
+        finally:
+            task.cancel()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'EVENTS_BROKER', 'alliance.events.InProcessBroker'))()
+    return _broker
+
+
+def publish(channel, event):
+    """Sends ``event`` (a JSON-serializable dict with a ``type``) to everyone subscribed to ``channel``.
+
+    Delivery is best effort: a broker failure is logged, never raised into the caller.
+    """
+    try:
+        get_broker().publish(channel, event)
+    except Exception:
+        logger.exception('Could not publish %s event on %s', event.get('type'), channel)
+
+
+def publish_many(channels, event):
+    """Sends ``event`` to each of ``channels`` (e.g. a batch of member channels), best effort like publish()."""
+    channels = list(channels)
+    if not channels:
+        return
+    try:
+        get_broker().publish_many(channels, event)
+    except Exception:
+        logger.exception('Could not publish %s event on %d channels', event.get('type'), len(channels))
+
+
+def detach_process():
+    """Marks this process as serving no event streams (the job worker, management commands).
+
+    Returns False when the configured broker is the in-process one, whose events
+    could then never reach a connection; it drops them with a warning.
+    """
+    broker = get_broker()
+    if isinstance(broker, InProcessBroker):
+        broker.detached = True
+        return False
+    return True
@@ -0,0 +1,86 @@
+import re
+from datetime import date
+
+from django import forms
+
+from .caching import get_reference_data
+
+NAME_PATTERN = re.compile(r'^[A-Z][a-zA-Z]*$')
+
+
+def validate_member_name(value, label='First name', required=True):
+    """Raises ValidationError unless ``value`` is a capitalised, letters-only name (blank allowed when not required)."""
+    if not value and not required:
+        return
+    if not value or not NAME_PATTERN.match(value):
+        raise forms.ValidationError(f'{label} must start with a capital letter and contain letters only.')
+
+
+def normalize_mobile(value):
+    """Returns the canonical 10-digit mobile number for ``value``; raises ValidationError when it is not a valid Indian mobile."""
+    if not value:
+        raise forms.ValidationError('Mobile number is required.')
+    # Normalize mobile: strip non-digits, handle optional +91/91/0 prefixes
+    digits = re.sub(r'\D', '', value)
+    # If starts with country code 91 or leading 0, take last 10 digits
+    if len(digits) > 10:
+        digits = digits[-10:]
+    if len(digits) != 10:
+        raise forms.ValidationError('Mobile number must contain 10 digits (optionally prefixed with +91 or 0).')
+    # Indian mobile numbers should start with 6-9
+    if digits[0] not in '6789':
+        raise forms.ValidationError('Invalid Indian mobile number. It should start with 6,7,8, or 9.')
+    return digits
+
+
+def years_ago(today, years):
+    """Same day ``years`` years before ``today`` (Feb 29 falls back to Feb 28)."""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+class PartnerSearchForm(forms.Form):
+    """Partner-preference filters for matches; every field is optional."""
+
+    age_min = forms.IntegerField(required=False, min_value=18, max_value=80)
+    age_max = forms.IntegerField(required=False, min_value=18, max_value=80)
+    caste = forms.TypedChoiceField(required=False, coerce=int, empty_value=None)
+    koottam = forms.TypedChoiceField(required=False, coerce=int, empty_value=None)
+    education = forms.TypedChoiceField(required=False, coerce=int, empty_value=None)
+    profession = forms.TypedChoiceField(required=False, coerce=int, empty_value=None)
+    income_min = forms.IntegerField(required=False, min_value=0)
+    income_max = forms.IntegerField(required=False, min_value=0)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # choices come from the cached reference data, so validation needs no queries
+        reference = get_reference_data()
+        self.fields['caste'].choices = [('', 'Any')] + [(c.pk, c.caste) for c in reference['castes']]
+        self.fields['koottam'].choices = [('', 'Any')] + [(k.pk, k.subcaste) for k in reference['koottams']]
+        self.fields['education'].choices = [('', 'Any')] + [(e.pk, e.education) for e in reference['educations']]
+        self.fields['profession'].choices = [('', 'Any')] + [(p.pk, p.profession) for p in reference['professions']]
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('age_min') and cleaned.get('age_max') and cleaned['age_min'] > cleaned['age_max']:
+            raise forms.ValidationError('Minimum age cannot be more than maximum age.')
+        if cleaned.get('income_min') and cleaned.get('income_max') and cleaned['income_min'] > cleaned['income_max']:
+            raise forms.ValidationError('Minimum income cannot be more than maximum income.')
+        return cleaned
+
+    def criteria(self, today=None):
+        """Keyword filters for MemberProfile.objects.matching_preferences() from the cleaned data."""
+        data = self.cleaned_data
+        today = today or date.today()
+        criteria = {}
+        if data.get('age_min'):
+            criteria['dob_before'] = years_ago(today, data['age_min'])
+        if data.get('age_max'):
+            # still age_max until the day before the next birthday
+            criteria['dob_after'] = years_ago(today, data['age_max'] + 1)
+        for field in ('caste', 'koottam', 'education', 'profession', 'income_min', 'income_max'):
+            if data.get(field) is not None:
+                criteria[field] = data[field]
+        return criteria
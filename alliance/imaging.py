@@ -0,0 +1,77 @@
+"""Derived image renditions for uploaded profile photos.
+
+Originals are kept as uploaded; listing and detail pages are served the
+smallest rendition that covers the rendered size (see ProfilePhoto.rendition_url).
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .models import ProfilePhoto
+
+# WebP is much smaller for photos; fall back to JPEG when Pillow was built without it
+RENDITION_FORMAT, RENDITION_EXT = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+RENDITION_QUALITY = 80
+
+
+def render_rendition(image_file, size, cover=True):
+    """Returns a ContentFile with ``image_file`` scaled to ``size`` px and EXIF stripped.
+
+    With ``cover`` the shorter side is scaled to ``size`` (for cropped avatars),
+    otherwise the longer side is. Images are never upscaled.
+    """
+    image_file.seek(0)
+    with Image.open(image_file) as img:
+        # apply the camera orientation before the EXIF block is dropped
+        img = ImageOps.exif_transpose(img)
+        scale = size / (min(img.size) if cover else max(img.size))
+        if scale < 1:
+            img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.Resampling.LANCZOS)
+        if RENDITION_FORMAT == 'JPEG' or img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if RENDITION_FORMAT == 'WEBP' and 'A' in img.getbands() else 'RGB')
+        buf = BytesIO()
+        # no exif= argument, so the metadata of the original is not carried over
+        img.save(buf, RENDITION_FORMAT, quality=RENDITION_QUALITY, optimize=True)
+    return ContentFile(buf.getvalue())
+
+
+def delete_files(files):
+    """Removes ``files`` ((storage, name) pairs) from storage once the current transaction commits."""
+    def delete():
+        for storage, name in files:
+            storage.delete(name)
+    transaction.on_commit(delete)
+
+
+def generate_renditions(photo):
+    """Builds every rendition listed in ProfilePhoto.RENDITIONS for ``photo`` and saves them.
+
+    Renditions of an earlier run are deleted from storage once the new ones are recorded.
+    """
+    base = os.path.splitext(os.path.basename(photo.image.name))[0]
+    previous = photo.rendition_files()
+    with photo.image.open('rb') as original:
+        for field_name, size, cover in photo.RENDITIONS:
+            content = render_rendition(original, size, cover=cover)
+            getattr(photo, field_name).save(f"{base}_{size}.{RENDITION_EXT}", content, save=False)
+    # update_fields keeps ProfilePhoto.save from touching the primary flag
+    photo.save(update_fields=[field_name for field_name, _, _ in photo.RENDITIONS])
+    delete_files(previous)
+
+
+def process_photo(photo_id):
+    """Background job: builds the renditions of a freshly uploaded photo and records its status."""
+    photo = ProfilePhoto.objects.filter(pk=photo_id).first()
+    if photo is None:
+        # deleted before the worker got to it
+        return
+    ProfilePhoto.objects.filter(pk=photo_id).update(status=ProfilePhoto.STATUS_PROCESSING)
+    try:
+        generate_renditions(photo)
+    except Exception:
+        ProfilePhoto.objects.filter(pk=photo_id).update(status=ProfilePhoto.STATUS_FAILED)
+        raise
+    ProfilePhoto.objects.filter(pk=photo_id).update(status=ProfilePhoto.STATUS_READY)
@@ -0,0 +1,107 @@
+"""A small database-backed job queue.
+
+Jobs are rows in the Job table naming a dotted-path callable and its keyword
+arguments. ``manage.py run_worker`` claims due jobs and runs them in a process
+pool, so slow work (e.g. photo resizing) stays out of the request cycle.
+
+This module must stay importable before Django is set up, because worker
+processes started with the ``spawn`` method unpickle these functions first;
+models are therefore imported inside the functions.
+"""
+import traceback
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+RETRY_BASE_DELAY = 30  # seconds; doubled after each failed attempt
+
+
+def enqueue(task, delay=0, max_attempts=3, **payload):
+    """Queues ``task`` (dotted path to a callable) to run with ``payload`` as keyword arguments."""
+    from .models import Job
+
+    return Job.objects.create(
+        task=task,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(limit):
+    """Marks up to ``limit`` due jobs as running and returns them.
+
+    The status-guarded UPDATE makes claiming safe with several workers polling the same table.
+    """
+    from django.db.models import F
+    from .models import Job
+
+    candidates = (
+        Job.objects.filter(status=Job.STATUS_PENDING, run_after__lte=timezone.now())
+        .order_by('run_after', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+    claimed = []
+    for pk in candidates:
+        updated = Job.objects.filter(pk=pk, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING, attempts=F('attempts') + 1, updated_at=timezone.now()
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_after', 'pk'))
+
+
+def requeue_stale(older_than):
+    """Returns jobs left running by a worker that died (not updated for ``older_than``) to the queue."""
+    from .models import Job
+
+    return Job.objects.filter(status=Job.STATUS_RUNNING, updated_at__lt=timezone.now() - older_than).update(
+        status=Job.STATUS_PENDING, updated_at=timezone.now()
+    )
+
+
+def finish(job, error=None):
+    """Records the outcome of a run; failed jobs are retried with exponential backoff until max_attempts."""
+    from .models import Job
+
+    now = timezone.now()
+    if error is None:
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_DONE, last_error='', updated_at=now)
+    elif job.attempts < job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_PENDING,
+            last_error=error,
+            run_after=now + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (job.attempts - 1)),
+            updated_at=now,
+        )
+    else:
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_FAILED, last_error=error, updated_at=now)
+
+
+def init_worker_process():
+    # runs first in every pool process; with the spawn start method Django is not set up yet
+    import django
+    from django.db import connections
+
+    django.setup()
+    # never share a database connection inherited from the parent through fork
+    connections.close_all()
+    from . import events
+
+    # jobs run outside the ASGI server; with the in-process broker their events are dropped with a warning
+    events.detach_process()
+
+
+def execute_job(task, payload):
+    """Runs one job inside a pool process; returns None on success or the formatted traceback."""
+    from django.db import close_old_connections
+
+    close_old_connections()
+    try:
+        import_string(task)(**payload)
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        close_old_connections()
+    return None
@@ -0,0 +1,113 @@
+import random
+import statistics
+import threading
+import time
+from datetime import date
+from itertools import count
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from alliance.models import BirthDetail, MemberProfile
+
+# registration rejects mobiles not starting with 6-9, so benchmark members never collide with real ones
+MOBILE_PREFIX = '5'
+CLEANUP_BATCH = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent-writer throughput of the configured database: registrations (the inserts done by '
+        'register, with the password hashed once up front) and profile saves (BirthDetail.save with its '
+        'completeness and search-index signals). Members created by the run are deleted afterwards. Compare '
+        'backends by running it with DJANGO_DB_ENGINE=postgresql, DJANGO_SQLITE_WAL=1 and DJANGO_SQLITE_WAL=0.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent writers.')
+        parser.add_argument('--seconds', type=float, default=10, help='Duration of each workload.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                mode = cursor.fetchone()[0]
+            self.stdout.write(f"SQLite {connection.settings_dict['NAME']} (journal_mode={mode})")
+        else:
+            self.stdout.write(f"{connection.vendor} {connection.settings_dict['NAME']}")
+        self.password = make_password('benchmark')
+        self.group, _ = Group.objects.get_or_create(name='Member')
+        self.numbers = count(int(time.time()) % 10 ** 6 * 1000)
+        self.profiles = {}
+        self.user_pks = []
+        threads, seconds = options['threads'], options['seconds']
+        self.stdout.write(f"{'workload':<14}{'threads':>8}{'ops':>8}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+        try:
+            self._report('register', self._run(self._register, threads, seconds), threads, seconds)
+            self.all_profiles = [pk for pks in self.profiles.values() for pk in pks]
+            if self.all_profiles:
+                self._report('profile save', self._run(self._save_profile, threads, seconds), threads, seconds)
+            else:
+                self.stdout.write(self.style.WARNING('No members were registered, skipping profile saves.'))
+        finally:
+            # only the members this run created, never real ones
+            for start in range(0, len(self.user_pks), CLEANUP_BATCH):
+                User.objects.filter(pk__in=self.user_pks[start:start + CLEANUP_BATCH]).delete()
+
+    def _register(self, worker):
+        mobile = f'{MOBILE_PREFIX}{next(self.numbers):09d}'
+        user = User.objects.create_user(username=mobile, first_name='Benchmark')
+        self.user_pks.append(user.pk)
+        user.password = self.password
+        user.save()
+        profile = MemberProfile.objects.create(user=user, mobile=mobile, gender='MF'[worker % 2])
+        user.groups.add(self.group)
+        self.profiles.setdefault(worker, []).append(profile.pk)
+
+    def _save_profile(self, worker):
+        # a worker whose registrations all failed edits the other workers' members
+        pks = self.profiles.get(worker) or self.all_profiles
+        detail, _ = BirthDetail.objects.get_or_create(profile_id=random.choice(pks))
+        detail.place_of_birth = f'Place {random.randrange(1000)}'
+        detail.date_of_birth = date(1995, 1, 1)
+        detail.save()
+
+    def _run(self, operation, threads, seconds):
+        timings, errors = [], []
+        deadline = time.perf_counter() + seconds
+
+        def worker(n):
+            mine, failed = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        operation(n)
+                    except DatabaseError:
+                        failed += 1
+                        continue
+                    mine.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            timings.extend(mine)
+            errors.append(failed)
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return sorted(timings), sum(errors)
+
+    def _report(self, name, result, threads, seconds):
+        timings, errors = result
+        if not timings:
+            self.stdout.write(f'{name:<14}{threads:>8}{0:>8}{"-":>9}{"-":>9}{"-":>9}{errors:>8}')
+            return
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{name:<14}{threads:>8}{len(timings):>8}{len(timings) / seconds:>9.1f}'
+            f'{statistics.median(timings) * 1000:>9.1f}{p95 * 1000:>9.1f}{errors:>8}'
+        )
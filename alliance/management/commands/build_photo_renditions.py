@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from alliance.imaging import process_photo
+from alliance.models import ProfilePhoto
+
+
+class Command(BaseCommand):
+    help = 'Generate resized renditions for profile photos that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate renditions for every photo.')
+
+    def handle(self, *args, **options):
+        photos = ProfilePhoto.objects.order_by('pk')
+        if not options['all']:
+            photos = photos.filter(image_small='')
+        done = failed = 0
+        for photo in photos.iterator():
+            try:
+                process_photo(photo.pk)
+                done += 1
+            except OSError as exc:
+                failed += 1
+                self.stderr.write(f'Photo {photo.pk}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Generated renditions for {done} photos ({failed} failed).'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from alliance import events
+from alliance.models import Notification
+from alliance.notifications import DELIVERY_CHUNK_SIZE, deliver_notification
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending segment-targeted notifications (normally done by run_worker).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Notification ids to (re)deliver; default is every pending one.')
+        parser.add_argument('--chunk-size', type=int, default=DELIVERY_CHUNK_SIZE, help='Recipients inserted per statement.')
+
+    def handle(self, *args, **options):
+        if not events.detach_process():
+            self.stderr.write(self.style.WARNING(
+                'EVENTS_BROKER is the in-process broker, so open event streams are not notified from this command.'
+            ))
+        qs = Notification.objects.filter(is_targeted=True)
+        if options['ids']:
+            qs = qs.filter(pk__in=options['ids'])
+        else:
+            qs = qs.exclude(delivery_status=Notification.DELIVERY_DONE)
+        for pk in qs.order_by('pk').values_list('pk', flat=True):
+            count = deliver_notification(pk, chunk_size=options['chunk_size'])
+            self.stdout.write(f'Notification {pk}: {count} recipients.')
+        self.stdout.write(self.style.SUCCESS('Done.'))
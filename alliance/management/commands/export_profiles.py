@@ -0,0 +1,168 @@
+import csv
+import json
+import sys
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alliance.models import MemberProfile
+
+# (output column, MemberProfile lookup); the detail sections and reference names are joined in the one query
+COLUMNS = (
+    ('id', 'pk'),
+    ('mobile', 'mobile'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('gender', 'gender'),
+    ('is_complete', 'is_complete'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('father_name', 'family_detail__father_name'),
+    ('mother_name', 'family_detail__mother_name'),
+    ('siblings', 'family_detail__siblings'),
+    ('caste', 'family_detail__caste__caste'),
+    ('koottam', 'family_detail__koottam__subcaste'),
+    ('kula_deity', 'family_detail__kula_deity'),
+    ('date_of_birth', 'birth_detail__date_of_birth'),
+    ('time_of_birth', 'birth_detail__time_of_birth'),
+    ('place_of_birth', 'birth_detail__place_of_birth'),
+    ('rasi', 'birth_detail__rasi__rasi'),
+    ('star', 'birth_detail__star__star'),
+    ('dhosam', 'birth_detail__dhosam__dhosam'),
+    ('education', 'professional_detail__education__education'),
+    ('profession', 'professional_detail__profession__profession'),
+    ('monthly_income', 'professional_detail__monthly_income'),
+)
+FORMATS = ('csv', 'jsonl', 'parquet')
+# updated_at is set in Python before commit, so a transaction committing after an export can carry an earlier value
+DEFAULT_LAG = 300
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.writer.writerow([name for name, _ in COLUMNS])
+
+    def write(self, rows):
+        self.writer.writerows([['' if v is None else _plain(v) for v in row] for row in rows])
+
+    def close(self):
+        pass
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.names = [name for name, _ in COLUMNS]
+
+    def write(self, rows):
+        for row in rows:
+            self.stream.write(json.dumps(dict(zip(self.names, map(_plain, row))), ensure_ascii=False) + '\n')
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """Writes each batch as a Parquet row group, so memory stays bounded by the chunk size."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise CommandError('Parquet export needs the pyarrow package.')
+        self.pa = pa
+        self.schema = pa.schema([
+            ('id', pa.int64()), ('mobile', pa.string()), ('first_name', pa.string()), ('last_name', pa.string()),
+            ('gender', pa.string()), ('is_complete', pa.bool_()),
+            ('created_at', pa.timestamp('us', tz='UTC')), ('updated_at', pa.timestamp('us', tz='UTC')),
+            ('father_name', pa.string()), ('mother_name', pa.string()), ('siblings', pa.string()),
+            ('caste', pa.string()), ('koottam', pa.string()), ('kula_deity', pa.string()),
+            ('date_of_birth', pa.date32()), ('time_of_birth', pa.time64('us')), ('place_of_birth', pa.string()),
+            ('rasi', pa.string()), ('star', pa.string()), ('dhosam', pa.string()),
+            ('education', pa.string()), ('profession', pa.string()), ('monthly_income', pa.int64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_batch(self.pa.record_batch(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        ))
+
+    def close(self):
+        self.writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Export member profiles joined with their user, detail sections and reference names as CSV, JSON lines '
+        'or Parquet (needs pyarrow), streaming in chunks. With --state only profiles created or changed since the '
+        'previous run with the same state file are exported; deleted profiles are not reported. Each incremental '
+        'run starts --lag seconds before the previous watermark, so profiles committed late are not missed and '
+        'rows near the watermark are exported again: load the output by upserting on id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Output file, or '-' for stdout (CSV and JSON lines only).")
+        parser.add_argument('--format', choices=FORMATS, help='Output format; default from the file extension, else csv.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched from the database per batch.')
+        parser.add_argument('--state', help='JSON file holding the last exported (updated_at, id); enables incremental export.')
+        parser.add_argument('--lag', type=int, default=DEFAULT_LAG,
+                            help='Seconds before the stored watermark to start an incremental export from.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or (Path(output).suffix.lstrip('.').lower() if output != '-' else 'csv')
+        if fmt not in FORMATS:
+            fmt = 'csv'
+        if fmt == 'parquet' and output == '-':
+            raise CommandError('Parquet cannot be written to stdout.')
+
+        state_path = Path(options['state']) if options['state'] else None
+        updated_at = last_id = None
+        if state_path and state_path.exists():
+            state = json.loads(state_path.read_text())
+            updated_at, last_id = datetime.fromisoformat(state['updated_at']), state['id']
+            if options['lag']:
+                # re-read the window in which an earlier-stamped transaction may have committed after the last run
+                updated_at, last_id = updated_at - timedelta(seconds=options['lag']), None
+
+        # (updated_at, id) order doubles as the incremental watermark; detail, user and photo changes bump updated_at
+        qs = MemberProfile.objects.changed_since(updated_at, last_id)
+        rows = qs.values_list(*[lookup for _, lookup in COLUMNS]).iterator(chunk_size=options['chunk_size'])
+        updated_index = [name for name, _ in COLUMNS].index('updated_at')
+
+        if fmt == 'parquet':
+            stream = None
+            writer = ParquetWriter(output)
+        else:
+            stream = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+            writer = CsvWriter(stream) if fmt == 'csv' else JsonlWriter(stream)
+        count = 0
+        last = None
+        try:
+            while batch := list(islice(rows, options['chunk_size'])):
+                writer.write(batch)
+                count += len(batch)
+                last = batch[-1]
+        finally:
+            writer.close()
+            if stream is not None and stream is not sys.stdout:
+                stream.close()
+
+        if state_path and last is not None:
+            state_path.write_text(json.dumps({'updated_at': last[updated_index].isoformat(), 'id': last[0]}))
+        # keep stdout clean when it carries the export
+        log = self.stderr if output == '-' else self.stdout
+        log.write(self.style.SUCCESS(f'Exported {count} profiles.'))
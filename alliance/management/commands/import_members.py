@@ -0,0 +1,249 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from itertools import islice
+from pathlib import Path
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from alliance import search
+from alliance.caching import get_reference_data
+from alliance.forms import normalize_mobile, validate_member_name
+from alliance.models import BirthDetail, FamilyDetail, MemberProfile, ProfessionalDetail
+from alliance.views import generate_password
+
+FAMILY_FIELDS = ('father_name', 'mother_name', 'siblings', 'kula_deity')
+GENDERS = {'m': 'M', 'male': 'M', 'f': 'F', 'female': 'F', 'o': 'O', 'other': 'O'}
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y')
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M%p')
+
+
+def _csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+def _xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CommandError('Reading .xlsx files needs the openpyxl package.')
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell or '').strip() for cell in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # spreadsheet cells hold mobile numbers and incomes as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def _parse(value, formats, label):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValidationError(f'Invalid {label} {value!r}.')
+
+
+class Command(BaseCommand):
+    help = (
+        'Import members from a CSV or XLSX file with a header row. Columns: first_name, last_name, mobile, gender '
+        'and optionally father_name, mother_name, siblings, caste, koottam, kula_deity, date_of_birth, '
+        'time_of_birth, place_of_birth, rasi, star, dhosam, education, profession, monthly_income. '
+        'Reference columns take the English or Tamil name. Members get the same initial password as on registration.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Members written per transaction.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes hashing passwords.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist.')
+        rows = _xlsx_rows(path) if path.suffix.lower() in ('.xlsx', '.xlsm') else _csv_rows(path)
+        self._build_maps()
+        self.seen_mobiles = set()
+        # a dry run must not write, not even the Member group
+        group = None if options['dry_run'] else Group.objects.get_or_create(name='Member')[0]
+        workers = options['workers'] or 1
+        imported = skipped = 0
+        numbered = enumerate(rows, start=2)
+        # worker processes need Django's settings for the password hashers
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            while chunk := list(islice(numbered, options['chunk_size'])):
+                members = []
+                for line, row in chunk:
+                    try:
+                        members.append(self._clean(row))
+                    except ValidationError as exc:
+                        skipped += 1
+                        self.stderr.write(f'Row {line}: {exc.messages[0]}')
+                # usernames and profile mobiles both start as the mobile, but the profile page can change the latter
+                mobiles = [m['mobile'] for m in members]
+                existing = set(User.objects.filter(username__in=mobiles).values_list('username', flat=True))
+                existing.update(MemberProfile.objects.filter(mobile__in=mobiles).values_list('mobile', flat=True))
+                if existing:
+                    skipped += len(existing)
+                    self.stderr.write(f"Already registered, skipped: {', '.join(sorted(existing))}")
+                    members = [m for m in members if m['mobile'] not in existing]
+                if members and not options['dry_run']:
+                    passwords = [generate_password(m['mobile']) for m in members]
+                    hashes = list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (4 * workers))))
+                    self._write(members, hashes, group)
+                if members:
+                    imported += len(members)
+                    self.stdout.write(f'{imported} members {"validated" if options["dry_run"] else "imported"}...')
+        verb = 'valid' if options['dry_run'] else 'imported'
+        self.stdout.write(self.style.SUCCESS(f'{imported} members {verb}, {skipped} rows skipped.'))
+
+    def _build_maps(self):
+        """Name (English or Tamil, case-insensitive) to id maps from the cached reference data."""
+        reference = get_reference_data()
+
+        def by_name(objects, *fields):
+            return {getattr(obj, field).strip().lower(): obj.pk for obj in objects for field in fields if getattr(obj, field)}
+
+        self.castes = by_name(reference['castes'], 'caste', 'caste_ta')
+        self.rasis = by_name(reference['rasis'], 'rasi', 'rasi_ta')
+        self.dhosams = by_name(reference['dhosams'], 'dhosam', 'dhosam_ta')
+        self.educations = by_name(reference['educations'], 'education', 'education_ta')
+        self.professions = by_name(reference['professions'], 'profession', 'profession_ta')
+        # koottam and star names repeat across castes and rasis, so they are keyed by their parent too
+        self.koottams = {}
+        for k in reference['koottams']:
+            for name in (k.subcaste, k.subcaste_ta):
+                if name:
+                    self.koottams[(k.caste_id, name.strip().lower())] = k.pk
+        self.stars = {}
+        for star in reference['stars']:
+            for name in (star.star, star.star_ta):
+                if name:
+                    self.stars.setdefault(name.strip().lower(), []).append((star.pk, star.rasi_id))
+
+    def _lookup(self, mapping, row, field):
+        value = _text(row, field)
+        if not value:
+            return None
+        try:
+            return mapping[value.lower()]
+        except KeyError:
+            raise ValidationError(f'Unknown {field.replace("_", " ")} {value!r}.')
+
+    def _clean(self, row):
+        """Validates one row the way registration does; returns the member's fields keyed by model."""
+        first_name, last_name = _text(row, 'first_name'), _text(row, 'last_name')
+        validate_member_name(first_name, 'First name')
+        validate_member_name(last_name, 'Last name', required=False)
+        mobile = normalize_mobile(_text(row, 'mobile'))
+        if mobile in self.seen_mobiles:
+            raise ValidationError(f'Mobile {mobile} appears earlier in the file.')
+        if not _text(row, 'gender'):
+            raise ValidationError('Gender is required.')
+        gender = GENDERS.get(_text(row, 'gender').lower())
+        if gender is None:
+            raise ValidationError(f"Unknown gender {_text(row, 'gender')!r}.")
+
+        family = {field: _text(row, field)[:200] for field in FAMILY_FIELDS}
+        family['caste_id'] = self._lookup(self.castes, row, 'caste')
+        koottam = _text(row, 'koottam')
+        family['koottam_id'] = None
+        if koottam:
+            family['koottam_id'] = self.koottams.get((family['caste_id'], koottam.lower()))
+            if family['koottam_id'] is None:
+                raise ValidationError(f'Unknown koottam {koottam!r} for the given caste.')
+
+        birth = {
+            'date_of_birth': self._date(row.get('date_of_birth')),
+            'time_of_birth': self._time(row.get('time_of_birth')),
+            'place_of_birth': _text(row, 'place_of_birth')[:200],
+            'rasi_id': self._lookup(self.rasis, row, 'rasi'),
+            'star_id': None,
+            'dhosam_id': self._lookup(self.dhosams, row, 'dhosam'),
+        }
+        star = _text(row, 'star')
+        if star:
+            candidates = [c for c in self.stars.get(star.lower(), ()) if birth['rasi_id'] in (None, c[1])]
+            if not candidates:
+                raise ValidationError(f'Unknown star {star!r} for the given rasi.')
+            # a star spanning two rasis needs the rasi column to pick one
+            if len(candidates) > 1:
+                raise ValidationError(f'Star {star!r} spans more than one rasi; give the rasi column.')
+            birth['star_id'], rasi_id = candidates[0]
+            birth['rasi_id'] = birth['rasi_id'] or rasi_id
+
+        income = _text(row, 'monthly_income')
+        professional = {
+            'education_id': self._lookup(self.educations, row, 'education'),
+            'profession_id': self._lookup(self.professions, row, 'profession'),
+            'monthly_income': None,
+        }
+        if income:
+            if not income.isdigit() or not 1000 <= int(income) <= 9999999:
+                raise ValidationError(f'Monthly income {income!r} must be a number between 1000 and 9999999.')
+            professional['monthly_income'] = int(income)
+
+        self.seen_mobiles.add(mobile)
+        return {
+            'first_name': first_name,
+            'last_name': last_name,
+            'mobile': mobile,
+            'gender': gender,
+            # sections left entirely blank get no row, as on the profile page
+            'family': family if any(family.values()) else None,
+            'birth': birth if any(birth.values()) else None,
+            'professional': professional if any(professional.values()) else None,
+        }
+
+    def _date(self, value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date) or not value:
+            return value or None
+        return _parse(str(value).strip(), DATE_FORMATS, 'date of birth').date()
+
+    def _time(self, value):
+        if isinstance(value, datetime):
+            return value.time()
+        if isinstance(value, time) or not value:
+            return value or None
+        return _parse(str(value).strip(), TIME_FORMATS, 'time of birth').time()
+
+    @transaction.atomic
+    def _write(self, members, hashes, group):
+        users = User.objects.bulk_create([
+            User(username=m['mobile'], first_name=m['first_name'], last_name=m['last_name'], password=password)
+            for m, password in zip(members, hashes)
+        ])
+        profiles = MemberProfile.objects.bulk_create([
+            MemberProfile(user=user, mobile=m['mobile'], gender=m['gender']) for user, m in zip(users, members)
+        ])
+        User.groups.through.objects.bulk_create([User.groups.through(user_id=user.pk, group_id=group.pk) for user in users])
+        # the detail querysets refresh completeness and the search documents of the profiles they touch
+        with_details = set()
+        for model, section in ((FamilyDetail, 'family'), (BirthDetail, 'birth'), (ProfessionalDetail, 'professional')):
+            rows = [model(profile=p, **m[section]) for p, m in zip(profiles, members) if m[section]]
+            if rows:
+                model.objects.bulk_create(rows)
+                with_details.update(row.profile_id for row in rows)
+        search.index_profiles([p.pk for p in profiles if p.pk not in with_details])
@@ -0,0 +1,89 @@
+import http.client
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from alliance.models import MemberProfile
+
+DEFAULT_PATHS = ['/matches/', '/shortlisted/', '/notifications/']
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server as one signed-in member and report throughput and latency per page. '
+        'Run it once against the WSGI deployment (gunicorn digimat.wsgi) and once against ASGI with '
+        'DJANGO_ASYNC_VIEWS=1 (uvicorn digimat.asgi:application), both on the same database, to compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server under test.')
+        parser.add_argument('--username', required=True, help='Member (mobile number) to sign in as.')
+        parser.add_argument('--path', action='append', dest='paths', help='Page to request; repeatable. Default: matches, shortlisted, notifications and one profile.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Simultaneous clients.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['username']!r}.")
+        # the server shares this database, so a session created here signs the clients in
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        paths = options['paths']
+        if not paths:
+            paths = list(DEFAULT_PATHS)
+            other = MemberProfile.objects.exclude(user=user).values_list('pk', flat=True).first()
+            if other:
+                paths.append(f'/profile/{other}/')
+
+        url = urlsplit(options['url'])
+        concurrency = options['concurrency']
+        total = options['requests']
+        self.stdout.write(f"{'page':<24}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'errors':>8}")
+        for path in paths:
+            per_client = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                results = list(pool.map(lambda n: self._run(url, path, cookie, n), per_client))
+            elapsed = time.perf_counter() - started
+            timings = sorted(t for ts, _ in results for t in ts)
+            errors = sum(e for _, e in results)
+            if not timings:
+                self.stdout.write(f'{path:<24}{"-":>9}{"-":>9}{"-":>9}{"-":>9}{errors:>8}')
+                continue
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'{path:<24}{len(timings) / elapsed:>9.1f}{statistics.median(timings) * 1000:>9.1f}'
+                f'{p95 * 1000:>9.1f}{timings[-1] * 1000:>9.1f}{errors:>8}'
+            )
+
+    def _run(self, url, path, cookie, count):
+        """Issues ``count`` GETs over one keep-alive connection; returns (timings of 200 responses, error count)."""
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        conn = connection_class(url.hostname, url.port, timeout=30)
+        timings, errors = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Cookie': cookie})
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                continue
+            if response.status == 200:
+                timings.append(time.perf_counter() - started)
+            else:
+                errors += 1
+        conn.close()
+        return timings, errors
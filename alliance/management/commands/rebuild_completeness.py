@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from alliance.models import MemberProfile
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored completeness flags on every MemberProfile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of profiles updated per statement.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pks = list(MemberProfile.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            MemberProfile.objects.filter(pk__in=batch).refresh_completeness(touch=False)
+        complete = MemberProfile.objects.complete().count()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt completeness for {len(pks)} profiles ({complete} complete).'))
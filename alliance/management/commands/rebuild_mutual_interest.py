@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from alliance.models import MutualInterest
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized mutual-interest pairs from Shortlist.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = MutualInterest.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt mutual interest ({rows // 2} pairs).'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from alliance import search
+from alliance.models import MemberProfile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the profile name/mobile search index from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of profiles indexed per batch.')
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING('This database has no search index; admin and member search use icontains.'))
+            return
+        batch_size = options['batch_size']
+        search.remove_profiles()
+        pks = list(MemberProfile.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            search.index_profiles(pks[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(pks)} profiles.'))
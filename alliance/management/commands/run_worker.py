@@ -0,0 +1,64 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from alliance import events, jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (photo renditions etc.) with a pool of worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Number of worker processes.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue jobs left running for this many seconds by a worker that died.')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of polling.')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        poll_interval = options['poll_interval']
+
+        requeued = jobs.requeue_stale(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale jobs.')
+
+        if not events.detach_process():
+            self.stderr.write(self.style.WARNING(
+                'EVENTS_BROKER is the in-process broker, so events published by jobs (targeted notifications) '
+                'cannot reach the event streams of the ASGI server and are dropped. Use alliance.events.RedisBroker.'
+            ))
+
+        # pool processes must open their own database connections
+        connections.close_all()
+        self.stdout.write(f'Worker started with {processes} processes.')
+        with ProcessPoolExecutor(max_workers=processes, initializer=jobs.init_worker_process) as pool:
+            running = {}
+            try:
+                while True:
+                    # keep every process busy with one job in hand and one queued
+                    free = processes * 2 - len(running)
+                    if free > 0:
+                        for job in jobs.claim(free):
+                            running[pool.submit(jobs.execute_job, job.task, job.payload)] = job
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+                    done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        exc = future.exception()
+                        error = f'{type(exc).__name__}: {exc}' if exc else future.result()
+                        jobs.finish(job, error)
+                        if error:
+                            self.stderr.write(f'Job {job.pk} ({job.task}) failed on attempt {job.attempts}.')
+            except KeyboardInterrupt:
+                # unfinished jobs stay running and are requeued by the next worker start
+                self.stdout.write('Stopping worker.')
+                pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,44 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .routers import STICKY_COOKIE, end_request, start_request
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@sync_and_async_middleware
+def read_your_writes(get_response):
+    """Lets safe requests read from the replica unless the member wrote something in the last few seconds.
+
+    Installed ahead of the session middleware (see settings), so session
+    reads and writes are routed like everything else in the request.
+    """
+
+    def begin(request):
+        return start_request(request.method in SAFE_METHODS and STICKY_COOKIE not in request.COOKIES)
+
+    def mark_sticky(response, state):
+        if state.wrote:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.DATABASE_REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = begin(request)
+            try:
+                response = await get_response(request)
+            finally:
+                end_request(token)
+            return mark_sticky(response, state)
+    else:
+        def middleware(request):
+            state, token = begin(request)
+            try:
+                response = get_response(request)
+            finally:
+                end_request(token)
+            return mark_sticky(response, state)
+    return middleware
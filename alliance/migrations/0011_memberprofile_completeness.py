@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Q
+
+
+def populate_completeness(apps, schema_editor):
+    MemberProfile = apps.get_model('alliance', 'MemberProfile')
+    FamilyDetail = apps.get_model('alliance', 'FamilyDetail')
+    BirthDetail = apps.get_model('alliance', 'BirthDetail')
+    ProfessionalDetail = apps.get_model('alliance', 'ProfessionalDetail')
+    family_filled = FamilyDetail.objects.filter(profile=OuterRef('pk')).filter(
+        ~Q(father_name='') | ~Q(mother_name='') | ~Q(siblings='')
+        | Q(caste__isnull=False) | Q(koottam__isnull=False) | ~Q(kula_deity='')
+    )
+    birth_filled = BirthDetail.objects.filter(profile=OuterRef('pk')).filter(
+        Q(date_of_birth__isnull=False) | Q(time_of_birth__isnull=False) | ~Q(place_of_birth='')
+        | Q(rasi__isnull=False) | Q(star__isnull=False)
+    )
+    prof_filled = ProfessionalDetail.objects.filter(profile=OuterRef('pk')).filter(
+        Q(education__isnull=False) | Q(profession__isnull=False)
+        | (Q(monthly_income__isnull=False) & ~Q(monthly_income=0))
+    )
+    MemberProfile.objects.update(
+        family_complete=Exists(family_filled),
+        birth_complete=Exists(birth_filled),
+        professional_complete=Exists(prof_filled),
+    )
+    MemberProfile.objects.filter(family_complete=True, birth_complete=True, professional_complete=True).update(is_complete=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0010_shortlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberprofile',
+            name='birth_complete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='family_complete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='is_complete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='professional_complete',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='memberprofile',
+            index=models.Index(fields=['gender', 'is_complete'], name='profile_gender_complete_idx'),
+        ),
+        migrations.RunPython(populate_completeness, migrations.RunPython.noop),
+    ]
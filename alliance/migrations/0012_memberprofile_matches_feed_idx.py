@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0011_memberprofile_completeness'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='memberprofile',
+            name='profile_gender_complete_idx',
+        ),
+        migrations.AddIndex(
+            model_name='memberprofile',
+            index=models.Index(condition=models.Q(('is_complete', True)), fields=['gender', 'created_at', 'id'], name='profile_matches_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0012_memberprofile_matches_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilephoto',
+            name='image_large',
+            field=models.ImageField(blank=True, editable=False, upload_to='profile_photos/renditions/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='profilephoto',
+            name='image_medium',
+            field=models.ImageField(blank=True, editable=False, upload_to='profile_photos/renditions/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='profilephoto',
+            name='image_small',
+            field=models.ImageField(blank=True, editable=False, upload_to='profile_photos/renditions/%Y/%m/%d/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0014_job_profilephoto_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='birthdetail',
+            index=models.Index(fields=['date_of_birth', 'profile'], name='birth_dob_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='familydetail',
+            index=models.Index(fields=['caste', 'koottam', 'profile'], name='family_caste_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professionaldetail',
+            index=models.Index(fields=['monthly_income', 'profile'], name='prof_income_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professionaldetail',
+            index=models.Index(fields=['education', 'profession', 'profile'], name='prof_edu_search_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # existing profiles count as unchanged since registration, not as all changed today
+    MemberProfile = apps.get_model('alliance', 'MemberProfile')
+    MemberProfile.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0015_partner_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('criteria', models.JSONField(blank=True, default=dict)),
+                ('seen_until', models.DateTimeField(default=django.utils.timezone.now)),
+                ('seen_until_id', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='memberprofile',
+            index=models.Index(condition=models.Q(('is_complete', True)), fields=['gender', 'updated_at', 'id'], name='profile_changed_feed_idx'),
+        ),
+        migrations.AddField(
+            model_name='savedsearch',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to='alliance.memberprofile'),
+        ),
+    ]
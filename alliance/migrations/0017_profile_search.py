@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from alliance import search
+
+
+def create_search_index(apps, schema_editor):
+    search.create_table(schema_editor)
+    search.index_profiles(
+        profile_model=apps.get_model('alliance', 'MemberProfile'),
+        using=schema_editor.connection.alias,
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0016_saved_search_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
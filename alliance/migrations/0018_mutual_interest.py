@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def populate_mutual_interest(apps, schema_editor):
+    # existing reciprocal shortlists, found with one self-join
+    schema_editor.execute(
+        'INSERT INTO alliance_mutualinterest (member_id, match_id, created_at) '
+        'SELECT s.member_id, s.favorite_id, '
+        'CASE WHEN s.added_at > r.added_at THEN s.added_at ELSE r.added_at END '
+        'FROM alliance_shortlist s '
+        'INNER JOIN alliance_shortlist r ON r.member_id = s.favorite_id AND r.favorite_id = s.member_id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0017_profile_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MutualInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='shortlist',
+            index=models.Index(fields=['favorite', 'member'], name='shortlist_favorite_member_idx'),
+        ),
+        migrations.AddField(
+            model_name='mutualinterest',
+            name='match',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mutual_matched_by', to='alliance.memberprofile'),
+        ),
+        migrations.AddField(
+            model_name='mutualinterest',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mutual_interests', to='alliance.memberprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='mutualinterest',
+            index=models.Index(fields=['member', '-created_at'], name='mutual_member_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mutualinterest',
+            constraint=models.UniqueConstraint(fields=('member', 'match'), name='unique_mutual_interest'),
+        ),
+        migrations.RunPython(populate_mutual_interest, migrations.RunPython.noop),
+    ]
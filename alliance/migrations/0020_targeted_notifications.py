@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0019_notification_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='delivery_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('delivering', 'Delivering'), ('delivered', 'Delivered')], editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='is_targeted',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recipient_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_caste',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alliance.caste'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_gender',
+            field=models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')], max_length=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_incomplete',
+            field=models.BooleanField(default=False, help_text='Only members whose profile is incomplete'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target_registered_before',
+            field=models.DateField(blank=True, help_text='Only members registered before this date', null=True),
+        ),
+        migrations.CreateModel(
+            name='NotificationRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_deliveries', to='alliance.memberprofile')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='alliance.notification')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('member', 'notification'), name='unique_notification_recipient')],
+            },
+        ),
+    ]
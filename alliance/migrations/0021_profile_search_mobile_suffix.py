@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from alliance import search
+
+
+def reindex_profiles(apps, schema_editor):
+    # documents now carry only the last digits of the mobile number
+    search.index_profiles(
+        profile_model=apps.get_model('alliance', 'MemberProfile'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0020_targeted_notifications'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_profiles, migrations.RunPython.noop),
+    ]
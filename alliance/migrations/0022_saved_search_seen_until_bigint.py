@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0021_profile_search_mobile_suffix'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='savedsearch',
+            name='seen_until_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
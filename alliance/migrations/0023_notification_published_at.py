@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+def backfill_published_at(apps, schema_editor):
+    # global and already delivered notifications were visible from creation; pending deliveries publish on completion
+    Notification = apps.get_model('alliance', 'Notification')
+    Notification.objects.filter(models.Q(is_targeted=False) | models.Q(delivery_status='delivered')).update(
+        published_at=models.F('created_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alliance', '0022_saved_search_seen_until_bigint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_created_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='published_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['published_at', 'id'], name='notification_published_idx'),
+        ),
+    ]
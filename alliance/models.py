@@ -1,6 +1,85 @@
-from django.db import models
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import connections, models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+from . import search
+
+GENDER_CHOICES = [
+    ('M', 'Male'),
+    ('F', 'Female'),
+    ('O', 'Other'),
+]
+
+
+# Background job queue (see alliance.jobs and the run_worker command)
+class Job(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200, help_text='Dotted path of the callable to run')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+class ShortlistQuerySet(models.QuerySet):
+    def add(self, member_id, favorite_id):
+        """Shortlists ``favorite_id`` for ``member_id`` in one statement; returns True if a row was inserted.
+
+        ``INSERT ... SELECT`` skips a missing or own profile and ``ON CONFLICT DO
+        NOTHING`` (backed by unique_together) makes repeats a no-op, so no
+        read-before-write is needed.
+        """
+        # raw writes pick the write alias themselves, as QuerySet.update() and delete() do
+        self._for_write = True
+        table = self.model._meta.db_table
+        profile_table = MemberProfile._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (member_id, favorite_id, added_at) '
+                f'SELECT %s, id, %s FROM {profile_table} WHERE id = %s AND id <> %s '
+                f'ON CONFLICT (member_id, favorite_id) DO NOTHING',
+                [member_id, timezone.now(), favorite_id, member_id],
+            )
+            inserted = cursor.rowcount == 1
+        if inserted:
+            # the raw INSERT sends no post_save, so the mutual pair is recorded here
+            MutualInterest.objects.using(self.db).record(member_id, favorite_id)
+        return inserted
+
+    def remove(self, member_id, favorite_id):
+        """Removes the shortlist row; returns True if one existed.
+
+        The post_delete signal drops the mutual pair (see alliance.signals), so
+        Django reads the row before its DELETE.
+        """
+        self._for_write = True
+        deleted, _ = self.filter(member_id=member_id, favorite_id=favorite_id).delete()
+        return deleted > 0
 
 
 # Shortlist model for favorites
@@ -9,26 +88,186 @@ class Shortlist(models.Model):
     favorite = models.ForeignKey('MemberProfile', on_delete=models.CASCADE, related_name='favorited_by')
     added_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ShortlistQuerySet.as_manager()
+
     class Meta:
         unique_together = ('member', 'favorite')
+        indexes = [
+            # covers the reverse-direction lookup of the mutual-interest self-join
+            models.Index(fields=['favorite', 'member'], name='shortlist_favorite_member_idx'),
+        ]
 
     def __str__(self):
         return f"{self.member} favorited {self.favorite}"
 
+
+class MutualInterestQuerySet(models.QuerySet):
+    def between(self, a, b):
+        return self.filter(models.Q(member_id=a, match_id=b) | models.Q(member_id=b, match_id=a))
+
+    def record(self, a, b):
+        """Materializes the pair (both directions) if ``a`` and ``b`` have shortlisted each other."""
+        self._for_write = True
+        table = self.model._meta.db_table
+        shortlist_table = Shortlist._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (member_id, match_id, created_at) '
+                f'SELECT s.member_id, s.favorite_id, %s FROM {shortlist_table} s '
+                f'INNER JOIN {shortlist_table} r ON r.member_id = s.favorite_id AND r.favorite_id = s.member_id '
+                f'WHERE (s.member_id = %s AND s.favorite_id = %s) OR (s.member_id = %s AND s.favorite_id = %s) '
+                f'ON CONFLICT (member_id, match_id) DO NOTHING',
+                [timezone.now(), a, b, b, a],
+            )
+
+    def rebuild(self):
+        """Recomputes every pair from Shortlist with a single self-join; returns the number of rows."""
+        self._for_write = True
+        table = self.model._meta.db_table
+        shortlist_table = Shortlist._meta.db_table
+        self.all().delete()
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (member_id, match_id, created_at) '
+                f'SELECT s.member_id, s.favorite_id, '
+                f'CASE WHEN s.added_at > r.added_at THEN s.added_at ELSE r.added_at END '
+                f'FROM {shortlist_table} s '
+                f'INNER JOIN {shortlist_table} r ON r.member_id = s.favorite_id AND r.favorite_id = s.member_id'
+            )
+            return cursor.rowcount
+
+
+# Materialized "both shortlisted each other" pairs, one row per direction; kept in sync with Shortlist by
+# ShortlistQuerySet.add() and the Shortlist signals in alliance.signals
+class MutualInterest(models.Model):
+    member = models.ForeignKey('MemberProfile', on_delete=models.CASCADE, related_name='mutual_interests')
+    match = models.ForeignKey('MemberProfile', on_delete=models.CASCADE, related_name='mutual_matched_by')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = MutualInterestQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'match'], name='unique_mutual_interest'),
+        ]
+        indexes = [
+            models.Index(fields=['member', '-created_at'], name='mutual_member_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.member} and {self.match}"
+
 # Notification model for Manager to send notifications to Seekers
+class NotificationQuerySet(models.QuerySet):
+    def for_member(self, member_id):
+        """Global notifications plus targeted ones delivered to ``member_id``."""
+        delivered = NotificationRecipient.objects.filter(member_id=member_id).values('notification_id')
+        return self.filter(models.Q(is_targeted=False) | models.Q(pk__in=delivered), published_at__isnull=False)
+
+
 class Notification(models.Model):
+    DELIVERY_PENDING = 'pending'
+    DELIVERY_DELIVERING = 'delivering'
+    DELIVERY_DONE = 'delivered'
+    DELIVERY_CHOICES = [
+        (DELIVERY_PENDING, 'Pending'),
+        (DELIVERY_DELIVERING, 'Delivering'),
+        (DELIVERY_DONE, 'Delivered'),
+    ]
+
     title = models.CharField(max_length=200)
     message = models.TextField()
     message_ta = models.TextField(blank=True, help_text='Message in Tamil')
     created_at = models.DateTimeField(auto_now_add=True)
+    # segment targeting; leave all empty to notify every member
+    target_gender = models.CharField(max_length=1, choices=GENDER_CHOICES, blank=True)
+    target_caste = models.ForeignKey('Caste', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    target_incomplete = models.BooleanField(default=False, help_text='Only members whose profile is incomplete')
+    target_registered_before = models.DateField(null=True, blank=True, help_text='Only members registered before this date')
+    # targeted notifications are delivered as NotificationRecipient rows by alliance.notifications
+    is_targeted = models.BooleanField(default=False, editable=False)
+    delivery_status = models.CharField(max_length=12, choices=DELIVERY_CHOICES, blank=True, editable=False)
+    recipient_count = models.PositiveIntegerField(default=0, editable=False)
+    # when members can see it: on save for global notifications, once delivery finishes for targeted ones;
+    # the inbox order and unread state follow it, so a late delivery is never older than notifications_seen_at
+    published_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = NotificationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # inbox pages and unread counts are published_at range scans (see views.notifications)
+            models.Index(fields=['published_at', 'id'], name='notification_published_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.is_targeted = bool(
+            self.target_gender or self.target_caste_id or self.target_incomplete or self.target_registered_before
+        )
+        if self.is_targeted and not self.delivery_status:
+            self.delivery_status = self.DELIVERY_PENDING
+        if not self.is_targeted and self.published_at is None:
+            self.published_at = timezone.now()
+        super().save(*args, **kwargs)
+
+    def recipients(self):
+        """Member profiles in this notification's segment, as one queryset."""
+        qs = MemberProfile.objects.all()
+        if self.target_gender:
+            qs = qs.filter(gender=self.target_gender)
+        if self.target_caste_id:
+            qs = qs.filter(family_detail__caste_id=self.target_caste_id)
+        if self.target_incomplete:
+            qs = qs.filter(is_complete=False)
+        if self.target_registered_before:
+            start = datetime.combine(self.target_registered_before, time.min)
+            qs = qs.filter(created_at__lt=timezone.make_aware(start) if settings.USE_TZ else start)
+        return qs
+
+
+# Delivery of a targeted Notification to one member
+class NotificationRecipient(models.Model):
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    member = models.ForeignKey('MemberProfile', on_delete=models.CASCADE, related_name='notification_deliveries')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'notification'], name='unique_notification_recipient'),
+        ]
+
+    def __str__(self):
+        return f"{self.notification} to {self.member}"
+
 # Profile photo model: up to 5 per user, one primary
 class ProfilePhoto(models.Model):
+    # (field, size in px, scale shorter side) for the renditions built by alliance.imaging
+    RENDITIONS = (
+        ('image_small', 64, True),
+        ('image_medium', 160, True),
+        ('image_large', 800, False),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     profile = models.ForeignKey('MemberProfile', on_delete=models.CASCADE, related_name='photos')
     image = models.ImageField(upload_to='profile_photos/%Y/%m/%d/')
+    image_small = models.ImageField(upload_to='profile_photos/renditions/%Y/%m/%d/', blank=True, editable=False)
+    image_medium = models.ImageField(upload_to='profile_photos/renditions/%Y/%m/%d/', blank=True, editable=False)
+    image_large = models.ImageField(upload_to='profile_photos/renditions/%Y/%m/%d/', blank=True, editable=False)
+    # state of the rendition post-processing done by the background worker
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_PENDING, editable=False)
     is_primary = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -38,27 +277,207 @@ class ProfilePhoto(models.Model):
         ]
 
     def save(self, *args, **kwargs):
-        # Ensure only one primary per profile
-        if self.is_primary:
-            ProfilePhoto.objects.filter(profile=self.profile, is_primary=True).update(is_primary=False)
+        # Ensure only one primary per profile; saves of other fields (e.g. renditions) leave the flag alone
+        update_fields = kwargs.get('update_fields')
+        if self.is_primary and (update_fields is None or 'is_primary' in update_fields):
+            ProfilePhoto.objects.filter(profile=self.profile, is_primary=True).exclude(pk=self.pk).update(is_primary=False)
         super().save(*args, **kwargs)
 
+    def rendition_files(self):
+        """(storage, name) of each stored rendition, for deleting them later."""
+        files = [getattr(self, field_name) for field_name, _, _ in self.RENDITIONS]
+        return [(f.storage, f.name) for f in files if f]
+
+    def rendition_url(self, width):
+        """URL of the smallest rendition at least ``width`` px, falling back to the original upload."""
+        for field_name, size, _ in self.RENDITIONS:
+            field = getattr(self, field_name)
+            if size >= width and field:
+                return field.url
+        return self.image.url
+
+# Saved partner-preference search with a "seen up to" watermark for new matches
+class SavedSearch(models.Model):
+    MAX_PER_MEMBER = 5
+
+    member = models.ForeignKey('MemberProfile', on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100)
+    # raw PartnerSearchForm data, so age ranges are re-evaluated against today's date
+    criteria = models.JSONField(default=dict, blank=True)
+    # last (updated_at, id) of a profile already shown for this search; a change committed after a later one was
+    # acknowledged (its updated_at is stamped before commit) is not reported as new, though it still lists in matches
+    seen_until = models.DateTimeField(default=timezone.now)
+    seen_until_id = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.member})"
+
+class MemberProfileQuerySet(models.QuerySet):
+    @staticmethod
+    def _section_filled():
+        """EXISTS subqueries telling whether each required section has at least one meaningful field."""
+        family_filled = FamilyDetail.objects.filter(profile=models.OuterRef('pk')).filter(
+            ~models.Q(father_name='') | ~models.Q(mother_name='') | ~models.Q(siblings='')
+            | models.Q(caste__isnull=False) | models.Q(koottam__isnull=False) | ~models.Q(kula_deity='')
+        )
+        birth_filled = BirthDetail.objects.filter(profile=models.OuterRef('pk')).filter(
+            models.Q(date_of_birth__isnull=False) | models.Q(time_of_birth__isnull=False) | ~models.Q(place_of_birth='')
+            | models.Q(rasi__isnull=False) | models.Q(star__isnull=False)
+        )
+        prof_filled = ProfessionalDetail.objects.filter(profile=models.OuterRef('pk')).filter(
+            models.Q(education__isnull=False) | models.Q(profession__isnull=False)
+            | (models.Q(monthly_income__isnull=False) & ~models.Q(monthly_income=0))
+        )
+        return models.Exists(family_filled), models.Exists(birth_filled), models.Exists(prof_filled)
+
+    def complete(self):
+        """Profiles with at least one meaningful field in each of the Family, Birth and Professional sections."""
+        return self.filter(is_complete=True)
+
+    def matching_preferences(self, dob_before=None, dob_after=None, caste=None, koottam=None,
+                             education=None, profession=None, income_min=None, income_max=None):
+        """Filters by partner preferences (see PartnerSearchForm.criteria); each filter uses a composite index."""
+        filters = {}
+        if dob_before:
+            filters['birth_detail__date_of_birth__lte'] = dob_before
+        if dob_after:
+            filters['birth_detail__date_of_birth__gt'] = dob_after
+        if caste:
+            filters['family_detail__caste_id'] = caste
+        if koottam:
+            filters['family_detail__koottam_id'] = koottam
+        if education:
+            filters['professional_detail__education_id'] = education
+        if profession:
+            filters['professional_detail__profession_id'] = profession
+        if income_min is not None:
+            filters['professional_detail__monthly_income__gte'] = income_min
+        if income_max is not None:
+            filters['professional_detail__monthly_income__lte'] = income_max
+        return self.filter(**filters)
+
+    def with_listing_photos(self):
+        """Prefetches user and photos (primary first) so listing cards render without per-profile queries."""
+        return self.select_related('user').prefetch_related(
+            models.Prefetch('photos', queryset=ProfilePhoto.objects.order_by('-is_primary', 'uploaded_at', 'pk'))
+        )
+
+    def changed_since(self, updated_at=None, pk=None):
+        """Profiles created or changed after the (updated_at, pk) watermark, oldest change first.
+
+        updated_at is stamped before commit, so a change committing after a
+        reader passed its timestamp is not returned to that reader; callers
+        that must not miss it start from an earlier watermark (see export_profiles).
+        """
+        qs = self.order_by('updated_at', 'pk')
+        if updated_at is not None:
+            qs = qs.filter(updated_at__gte=updated_at).filter(
+                models.Q(updated_at__gt=updated_at) | models.Q(pk__gt=pk or 0)
+            )
+        return qs
+
+    def touch(self):
+        """Marks these profiles as changed for saved-search watermarks."""
+        return self.update(updated_at=timezone.now())
+
+    def refresh_completeness(self, touch=True):
+        """Recompute the stored section flags and is_complete for these profiles.
+
+        With ``touch`` the profiles' updated_at is bumped as well, since a
+        detail section changed; bulk rebuilds pass False.
+        """
+        family_filled, birth_filled, prof_filled = self._section_filled()
+        self.update(family_complete=family_filled, birth_complete=birth_filled, professional_complete=prof_filled)
+        changes = {'is_complete': models.ExpressionWrapper(
+            models.Q(family_complete=True, birth_complete=True, professional_complete=True),
+            output_field=models.BooleanField(),
+        )}
+        if touch:
+            changes['updated_at'] = timezone.now()
+        return self.update(**changes)
+
+
+class ProfileDetailQuerySet(models.QuerySet):
+    """Queryset for the per-profile detail sections.
+
+    Bulk writes skip model signals, so they refresh the owning profiles'
+    completeness flags and search documents here.
+    """
+
+    def _refresh_profiles(self, profile_ids):
+        MemberProfile.objects.filter(pk__in=profile_ids).refresh_completeness()
+        search.index_profiles(profile_ids, using=self.db)
+
+    def update(self, **kwargs):
+        # read the affected ids from the database about to be written, not a replica
+        self._for_write = True
+        profile_ids = set(self.values_list('profile_id', flat=True))
+        rows = super().update(**kwargs)
+        new_profile = kwargs.get('profile_id', kwargs.get('profile'))
+        if new_profile is not None:
+            profile_ids.add(getattr(new_profile, 'pk', new_profile))
+        self._refresh_profiles(profile_ids)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._refresh_profiles({obj.profile_id for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, *args, **kwargs):
+        rows = super().bulk_update(objs, *args, **kwargs)
+        self._refresh_profiles({obj.profile_id for obj in objs})
+        return rows
+
+
 class MemberProfile(models.Model):
-    GENDER_CHOICES = [
-        ('M', 'Male'),
-        ('F', 'Female'),
-        ('O', 'Other'),
-    ]
+    GENDER_CHOICES = GENDER_CHOICES
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     mobile = models.CharField(max_length=15, unique=True)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, default='O')
     created_at = models.DateTimeField(auto_now_add=True)
+    # bumped whenever the profile, its detail sections or its photos change (see SavedSearch)
+    updated_at = models.DateTimeField(auto_now=True)
+    # denormalized completeness state, maintained by alliance.signals and ProfileDetailQuerySet
+    family_complete = models.BooleanField(default=False, editable=False)
+    birth_complete = models.BooleanField(default=False, editable=False)
+    professional_complete = models.BooleanField(default=False, editable=False)
+    is_complete = models.BooleanField(default=False, editable=False)
+    # newest notification the member has seen; later ones count as unread
+    notifications_seen_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = MemberProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # serves the matches filter and its keyset pagination order (see alliance.pagination)
+            models.Index(
+                fields=['gender', 'created_at', 'id'],
+                condition=models.Q(is_complete=True),
+                name='profile_matches_feed_idx',
+            ),
+            # serves the "new since last visit" query of saved searches
+            models.Index(
+                fields=['gender', 'updated_at', 'id'],
+                condition=models.Q(is_complete=True),
+                name='profile_changed_feed_idx',
+            ),
+        ]
 
     def __str__(self):
         name = f"{self.user.first_name} {self.user.last_name}".strip()
         return name or self.mobile
 
+    def listing_photo(self):
+        """Primary photo, else the first uploaded one; served from prefetched photos when available."""
+        photos = self.photos.all()
+        return next((photo for photo in photos if photo.is_primary), None) or photos.first()
+
 
 class Caste(models.Model):
     caste = models.CharField(max_length=100, unique=True)
@@ -95,6 +514,14 @@ class FamilyDetail(models.Model):
     koottam = models.ForeignKey(Koottam, on_delete=models.SET_NULL, null=True, blank=True)
     kula_deity = models.CharField(max_length=200, blank=True)
 
+    objects = ProfileDetailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # partner search by caste/koottam, covering the join back to the profile
+            models.Index(fields=['caste', 'koottam', 'profile'], name='family_caste_search_idx'),
+        ]
+
     def __str__(self):
         return f"Family of {self.profile}"
 
@@ -146,6 +573,14 @@ class BirthDetail(models.Model):
     star = models.ForeignKey(Star, on_delete=models.SET_NULL, null=True, blank=True)
     dhosam = models.ForeignKey(Dhosam, on_delete=models.SET_NULL, null=True, blank=True)
 
+    objects = ProfileDetailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # partner search by age range, covering the join back to the profile
+            models.Index(fields=['date_of_birth', 'profile'], name='birth_dob_search_idx'),
+        ]
+
     def __str__(self):
         return f"Birth details for {self.profile}"
 
@@ -185,5 +620,14 @@ class ProfessionalDetail(models.Model):
         help_text='Enter monthly income (min 4 digits, max 7 digits)'
     )
 
+    objects = ProfileDetailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # partner search by income range or education/profession, covering the join back to the profile
+            models.Index(fields=['monthly_income', 'profile'], name='prof_income_search_idx'),
+            models.Index(fields=['education', 'profession', 'profile'], name='prof_edu_search_idx'),
+        ]
+
     def __str__(self):
         return f"Professional details for {self.profile}"
@@ -0,0 +1,99 @@
+"""Keyset (cursor) pagination for listing pages.
+
+Rows are ordered by ``(created_at, id)`` (or another ``field``, newest
+first with ``descending=True``) and each page starts strictly after the last row of the
+previous one, so deep pages cost the same as the first.
+"""
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 24
+
+
+def encode_cursor(obj, field='created_at'):
+    raw = f"{getattr(obj, field).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _aware_datetime(value):
+    # cursors are only ever encoded from aware datetimes; a naive one cannot be compared with the rows
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        raise ValueError('Cursor datetime has no timezone.')
+    return dt
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, pk) (or the field given to encode_cursor) for a cursor string; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split('|')
+        return _aware_datetime(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+
+
+def _keyset_queryset(queryset, cursor, page_size, descending, field):
+    if descending:
+        queryset = queryset.order_by(f'-{field}', '-pk')
+    else:
+        queryset = queryset.order_by(field, 'pk')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        # the redundant field bound lets the database seek into the index instead of filtering from its start
+        if descending:
+            queryset = queryset.filter(**{f'{field}__lte': value}).filter(Q(**{f'{field}__lt': value}) | Q(pk__lt=pk))
+        else:
+            queryset = queryset.filter(**{f'{field}__gte': value}).filter(Q(**{f'{field}__gt': value}) | Q(pk__gt=pk))
+    return queryset[:page_size + 1]
+
+
+def _keyset_result(items, page_size, field):
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1], field)
+    return items, next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE, descending=False, field='created_at'):
+    """Returns (items, next_cursor) for the page following ``cursor``; next_cursor is None on the last page."""
+    items = list(_keyset_queryset(queryset, cursor, page_size, descending, field))
+    return _keyset_result(items, page_size, field)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=PAGE_SIZE, descending=False, field='created_at'):
+    """Async variant of keyset_page() for async views."""
+    items = [obj async for obj in _keyset_queryset(queryset, cursor, page_size, descending, field)]
+    return _keyset_result(items, page_size, field)
+
+
+def ranked_page(entries, cursor=None, page_size=PAGE_SIZE):
+    """Keyset pagination over an in-memory ranking.
+
+    ``entries`` are (score, created_at, pk) tuples sorted best score first, then
+    by (created_at, pk); the cursor records the last entry's position in that order.
+    """
+    start = 0
+    if cursor:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            score, created_at, pk = json.loads(raw)
+            start = bisect_right(
+                entries, (-int(score), _aware_datetime(created_at), int(pk)),
+                key=lambda entry: (-entry[0], entry[1], entry[2]),
+            )
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as exc:
+            raise ValueError('Invalid cursor.') from exc
+    page = entries[start:start + page_size]
+    next_cursor = None
+    if start + page_size < len(entries):
+        score, created_at, pk = page[-1]
+        raw = json.dumps([score, created_at.isoformat(), pk])
+        next_cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    return page, next_cursor
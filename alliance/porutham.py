@@ -0,0 +1,239 @@
+"""Star/rasi porutham (compatibility) scoring for match ranking.
+
+The ten traditional poruthams are split into the seven that depend only on
+the birth stars (nakshatras) and the three that depend on the rasis. Both
+are precomputed when this module is imported, into flat byte arrays indexed
+``girl * N + boy``, so ranking a candidate list is a couple of array lookups
+per candidate.
+
+Star and Rasi rows are mapped onto the canonical nakshatra/rasi order by
+name; a star that spans two rasis has one Star row per rasi and both map to
+the same nakshatra.
+"""
+from array import array
+
+from .caching import get_reference_data
+
+NAKSHATRAS = (
+    ('ashwini', 'aswini', 'asvini'),
+    ('bharani',),
+    ('kruthigai', 'krithigai', 'karthigai', 'krittika', 'kritika'),
+    ('rohini',),
+    ('mirgashirsham', 'mrigashirsham', 'mirugasirisham', 'mrigashirsha', 'mrigasira'),
+    ('thiruvathirai', 'thiruvadhirai', 'ardra', 'arudra'),
+    ('punarpoosam', 'punarpusam', 'punarvasu'),
+    ('poosam', 'pusam', 'pushya', 'pushyam'),
+    ('ayilyam', 'ashlesha', 'aslesha'),
+    ('magam', 'magha', 'makam'),
+    ('pooram', 'puram', 'purva phalguni', 'pubba'),
+    ('uthiram', 'uttaram', 'uttara phalguni'),
+    ('hastham', 'hastam', 'hasta'),
+    ('chithirai', 'chitirai', 'chitra', 'chithra'),
+    ('swathi', 'swati', 'svati'),
+    ('vishakam', 'visakam', 'vishakha', 'visakha'),
+    ('anusham', 'anuradha'),
+    ('kettai', 'jyeshtha', 'jyeshta'),
+    ('moolam', 'mula', 'moola'),
+    ('pooradam', 'puradam', 'purva ashadha'),
+    ('uthiradam', 'uttaradam', 'uttara ashadha'),
+    ('thiruvonam', 'shravana', 'sravana', 'shravanam'),
+    ('avittam', 'dhanishta', 'dhanishtha'),
+    ('sadhayam', 'sathayam', 'shatabhisha', 'satabhisha'),
+    ('poorattathi', 'purattathi', 'purva bhadrapada'),
+    ('uthirattathi', 'uttarattathi', 'uttara bhadrapada'),
+    ('revathi', 'revati'),
+)
+
+RASIS = (
+    ('aries', 'mesham'),
+    ('taurus', 'rishabam', 'rishabham'),
+    ('gemini', 'mithunam'),
+    ('cancer', 'kadagam', 'katakam'),
+    ('leo', 'simmam'),
+    ('virgo', 'kanni'),
+    ('libra', 'thulam'),
+    ('scorpio', 'viruchigam', 'vrischikam'),
+    ('sagittarius', 'dhanusu', 'dhanus'),
+    ('capricorn', 'magaram', 'makaram'),
+    ('aquarius', 'kumbam', 'kumbham'),
+    ('pisces', 'meenam'),
+)
+
+STAR_POSITIONS = {alias: index for index, aliases in enumerate(NAKSHATRAS) for alias in aliases}
+RASI_POSITIONS = {alias: index for index, aliases in enumerate(RASIS) for alias in aliases}
+
+N_STARS = len(NAKSHATRAS)
+N_RASIS = len(RASIS)
+
+# 0 = Deva, 1 = Manushya, 2 = Rakshasa
+GANA = (0, 1, 2, 1, 0, 1, 0, 0, 2, 2, 1, 1, 0, 2, 0, 2, 0, 2, 2, 1, 1, 0, 2, 2, 1, 1, 0)
+
+# yoni animals; pairs listed in YONI_ENEMIES are incompatible
+YONI = (
+    'horse', 'elephant', 'sheep', 'serpent', 'serpent', 'dog', 'cat', 'sheep', 'cat', 'rat',
+    'rat', 'cow', 'buffalo', 'tiger', 'buffalo', 'tiger', 'deer', 'deer', 'dog', 'monkey',
+    'mongoose', 'monkey', 'lion', 'horse', 'lion', 'cow', 'elephant',
+)
+YONI_ENEMIES = {
+    frozenset(pair) for pair in (
+        ('horse', 'buffalo'), ('elephant', 'lion'), ('sheep', 'monkey'), ('serpent', 'mongoose'),
+        ('dog', 'deer'), ('cat', 'rat'), ('cow', 'tiger'),
+    )
+}
+
+# rajju repeats every nine stars: feet, thigh, navel, neck, head, neck, navel, thigh, feet
+RAJJU_CYCLE = (0, 1, 2, 3, 4, 3, 2, 1, 0)
+
+VEDHA_PAIRS = {
+    frozenset(pair) for pair in (
+        (0, 17), (1, 16), (2, 15), (3, 14), (5, 21), (6, 20), (7, 19), (8, 18),
+        (9, 26), (10, 25), (11, 24), (12, 23), (4, 13), (4, 22), (13, 22),
+    )
+}
+
+# rasi lords: Sun, Moon, Mars, Mercury, Jupiter, Venus, Saturn
+RASI_LORD = ('mars', 'venus', 'mercury', 'moon', 'sun', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'saturn', 'jupiter')
+LORD_ENEMIES = {
+    'sun': {'venus', 'saturn'},
+    'moon': set(),
+    'mars': {'mercury'},
+    'mercury': {'moon'},
+    'jupiter': {'mercury', 'venus'},
+    'venus': {'sun', 'moon'},
+    'saturn': {'sun', 'moon', 'mars'},
+}
+VASYA = (
+    {4, 7}, {3, 6}, {5}, {7, 8}, {6}, {11, 2}, {5, 9}, {3}, {11}, {0, 10}, {0}, {9},
+)
+
+STAR_POSSIBLE = 7
+RASI_POSSIBLE = 3
+MAX_SCORE = STAR_POSSIBLE + RASI_POSSIBLE
+
+# set on a star pair when Rajju or Vedha fails; such pairs are never shown as matches
+BLOCKED = 0x80
+
+
+def _star_porutham(girl, boy):
+    count = (boy - girl) % N_STARS + 1
+    dina = count % 9 in (0, 2, 4, 6, 8)
+    gana = GANA[girl] == GANA[boy] or {GANA[girl], GANA[boy]} == {0, 1}
+    mahendra = count in (4, 7, 10, 13, 16, 19, 22, 25)
+    stree_deergha = count > 13
+    yoni = frozenset((YONI[girl], YONI[boy])) not in YONI_ENEMIES
+    rajju = RAJJU_CYCLE[girl % 9] != RAJJU_CYCLE[boy % 9]
+    vedha = frozenset((girl, boy)) not in VEDHA_PAIRS
+    score = sum((dina, gana, mahendra, stree_deergha, yoni, rajju, vedha))
+    return score if rajju and vedha else score | BLOCKED
+
+
+def _rasi_porutham(girl, boy):
+    count = (boy - girl) % N_RASIS + 1
+    rasi = count in (1, 7, 9, 10, 11, 12)
+    girl_lord, boy_lord = RASI_LORD[girl], RASI_LORD[boy]
+    adhipathi = boy_lord not in LORD_ENEMIES[girl_lord] and girl_lord not in LORD_ENEMIES[boy_lord]
+    vasya = boy in VASYA[girl] or girl in VASYA[boy]
+    return sum((rasi, adhipathi, vasya))
+
+
+STAR_MATRIX = array('B', (_star_porutham(g, b) for g in range(N_STARS) for b in range(N_STARS)))
+RASI_MATRIX = array('B', (_rasi_porutham(g, b) for g in range(N_RASIS) for b in range(N_RASIS)))
+
+
+def _normalize(name):
+    return ' '.join(name.lower().replace('-', ' ').split())
+
+
+def star_position(name):
+    return STAR_POSITIONS.get(_normalize(name))
+
+
+def rasi_position(name):
+    return RASI_POSITIONS.get(_normalize(name))
+
+
+def dhosam_category(name):
+    """Groups Dhosam rows: 'none', 'chevvai', 'rahu_ketu', or None when no rule applies."""
+    name = _normalize(name)
+    if name.startswith('no '):
+        return 'none'
+    if 'chevvai' in name or 'sevvai' in name or 'mangal' in name:
+        return 'chevvai'
+    if ('rahu' in name or 'raghu' in name) and ('kethu' in name or 'ketu' in name):
+        return 'rahu_ketu'
+    return None
+
+
+def dhosam_compatible(a, b):
+    """A chevvai or rahu/ketu dhosam is only matched with the same dhosam; unknown values are not filtered."""
+    if a is None or b is None:
+        return True
+    return a == b
+
+
+class PoruthamIndex:
+    """Maps Star/Rasi/Dhosam ids onto positions in the precomputed matrices."""
+
+    def __init__(self, stars, rasis, dhosams):
+        self.star_pos = {s.pk: star_position(s.star) for s in stars}
+        self.rasi_pos = {r.pk: rasi_position(r.rasi) for r in rasis}
+        self.dhosam_cat = {d.pk: dhosam_category(d.dhosam) for d in dhosams}
+
+    def score(self, girl_star, girl_rasi, boy_star, boy_rasi):
+        """Returns (score out of MAX_SCORE, blocked) for Star/Rasi ids, or (None, False) if the stars are unknown."""
+        g, b = self.star_pos.get(girl_star), self.star_pos.get(boy_star)
+        if g is None or b is None:
+            return None, False
+        value = STAR_MATRIX[g * N_STARS + b]
+        score = value & ~BLOCKED
+        gr, br = self.rasi_pos.get(girl_rasi), self.rasi_pos.get(boy_rasi)
+        if gr is not None and br is not None:
+            score += RASI_MATRIX[gr * N_RASIS + br]
+        return score, bool(value & BLOCKED)
+
+    def rank(self, viewer, viewer_is_girl, candidates, min_score=0):
+        """Scores candidate rows in bulk.
+
+        ``viewer`` is (star_id, rasi_id, dhosam_id); ``candidates`` are
+        (pk, star_id, rasi_id, dhosam_id, created_at) rows. Returns
+        (score, created_at, pk) for candidates passing the Rajju/Vedha, dhosam
+        and ``min_score`` checks, best first and then oldest first.
+        """
+        v_star, v_rasi, v_dhosam = viewer
+        v_cat = self.dhosam_cat.get(v_dhosam)
+        v_pos = self.star_pos.get(v_star)
+        v_rasi_pos = self.rasi_pos.get(v_rasi)
+        if v_pos is None:
+            return []
+        ranked = []
+        for pk, star, rasi, dhosam, created_at in candidates:
+            c_pos = self.star_pos.get(star)
+            if c_pos is None or not dhosam_compatible(v_cat, self.dhosam_cat.get(dhosam)):
+                continue
+            girl, boy = (v_pos, c_pos) if viewer_is_girl else (c_pos, v_pos)
+            value = STAR_MATRIX[girl * N_STARS + boy]
+            if value & BLOCKED:
+                continue
+            score = value
+            c_rasi_pos = self.rasi_pos.get(rasi)
+            if v_rasi_pos is not None and c_rasi_pos is not None:
+                girl_r, boy_r = (v_rasi_pos, c_rasi_pos) if viewer_is_girl else (c_rasi_pos, v_rasi_pos)
+                score += RASI_MATRIX[girl_r * N_RASIS + boy_r]
+            if score >= min_score:
+                ranked.append((score, created_at, pk))
+        ranked.sort(key=lambda row: (-row[0], row[1], row[2]))
+        return ranked
+
+
+_index_local = (None, None)
+
+
+def get_porutham_index():
+    """PoruthamIndex for the current reference data, rebuilt only when that data changes."""
+    global _index_local
+    data = get_reference_data()
+    source, index = _index_local
+    if source is not data:
+        index = PoruthamIndex(data['stars'], data['rasis'], data['dhosams'])
+        _index_local = (data, index)
+    return index
@@ -0,0 +1,72 @@
+"""Primary/replica routing for deployments with a read replica.
+
+When settings.DATABASES has a ``replica`` alias, ``PrimaryReplicaRouter``
+sends every write to ``default``. Reads go to the replica only inside
+requests that ``alliance.middleware.read_your_writes`` has marked as safe:
+
+- GET/HEAD requests from a browser without the sticky cookie;
+- and only until the request itself writes something, after which it reads
+  from the primary too.
+
+A request that writes sets the cookie for ``DATABASE_REPLICA_STICKY_SECONDS``
+so the member's next pages see their own changes despite replication lag.
+Management commands, the job worker and tests never read from the replica.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA = 'replica'
+STICKY_COOKIE = 'db_primary'
+
+
+class RequestRouting:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+# set per request by the middleware; the object is shared with threads the request hops to, so writes seen there count
+_routing = ContextVar('alliance_db_routing', default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def start_request(use_replica):
+    """Begins routing for a request; returns (state, token) for end_request()."""
+    state = RequestRouting(use_replica)
+    return state, _routing.set(state)
+
+
+def end_request(token):
+    _routing.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # related lookups follow the object they start from
+            return instance._state.db
+        state = _routing.get()
+        if state is not None and state.use_replica and not state.wrote:
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica is migrated by replication, not by manage.py migrate
+        return db != REPLICA
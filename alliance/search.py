@@ -0,0 +1,124 @@
+"""Name/mobile/place search index for member profiles.
+
+Each profile gets one text document (names, the last digits of the mobile,
+caste and koottam in English and Tamil, place of birth) in
+``alliance_profile_search``. Members search this index too, so it never
+holds the full mobile number, which the pages mask:
+
+- SQLite: an FTS5 table with the trigram tokenizer, keyed by the profile id
+  as rowid, so substring terms of 3+ characters are index lookups.
+- PostgreSQL: a plain table with a ``pg_trgm`` GIN index, queried with ILIKE.
+
+Other databases fall back to ``icontains`` over the joined columns. The
+index is kept in sync by alliance.signals; ``rebuild_search_index``
+repopulates it from scratch.
+"""
+from django.apps import apps
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'alliance_profile_search'
+MIN_TERM_LENGTH = 3
+MOBILE_SUFFIX_LENGTH = 4
+
+DOCUMENT_FIELDS = (
+    'user__first_name', 'user__last_name',
+    'family_detail__caste__caste', 'family_detail__caste__caste_ta',
+    'family_detail__koottam__subcaste', 'family_detail__koottam__subcaste_ta',
+    'birth_detail__place_of_birth',
+)
+
+
+def is_supported(conn=connection):
+    return conn.vendor in ('sqlite', 'postgresql')
+
+
+def create_table(schema_editor):
+    """Creates the search table; used by the migration."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {TABLE} USING fts5(document, tokenize='trigram')")
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(f'CREATE TABLE {TABLE} (profile_id bigint PRIMARY KEY, document text NOT NULL)')
+        schema_editor.execute(f'CREATE INDEX {TABLE}_trgm ON {TABLE} USING gin (document gin_trgm_ops)')
+
+
+def drop_table(schema_editor):
+    if is_supported(schema_editor.connection):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def _documents(profile_model, pks=None, using=None):
+    """Yields (profile_id, document) rows built from a single values query."""
+    qs = profile_model.objects.using(using).order_by('pk')
+    if pks is not None:
+        qs = qs.filter(pk__in=pks)
+    for row in qs.values_list('pk', 'mobile', *DOCUMENT_FIELDS).iterator(chunk_size=2000):
+        values = [row[1][-MOBILE_SUFFIX_LENGTH:], *row[2:]]
+        yield row[0], ' '.join(str(value) for value in values if value)
+
+
+def index_profiles(pks=None, profile_model=None, using=None):
+    """(Re)writes the documents of the given profiles, or of all profiles when ``pks`` is None."""
+    conn = connections[using or 'default']
+    if not is_supported(conn):
+        return
+    profile_model = profile_model or apps.get_model('alliance', 'MemberProfile')
+    if pks is not None:
+        pks = list(pks)
+        if not pks:
+            return
+    remove_profiles(pks, using=using)
+    rows = list(_documents(profile_model, pks, conn.alias))
+    if not rows:
+        return
+    id_column = 'rowid' if conn.vendor == 'sqlite' else 'profile_id'
+    with conn.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {TABLE} ({id_column}, document) VALUES (%s, %s)', rows)
+
+
+def remove_profiles(pks=None, using=None):
+    """Drops the documents of the given profiles, or every document when ``pks`` is None."""
+    conn = connections[using or 'default']
+    if not is_supported(conn):
+        return
+    id_column = 'rowid' if conn.vendor == 'sqlite' else 'profile_id'
+    with conn.cursor() as cursor:
+        if pks is None:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            return
+        pks = list(pks)
+        for start in range(0, len(pks), 500):
+            batch = pks[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {TABLE} WHERE {id_column} IN ({placeholders})', batch)
+
+
+def search_terms(query):
+    """Words of ``query`` long enough for a trigram lookup."""
+    return [term for term in query.split() if len(term) >= MIN_TERM_LENGTH]
+
+
+def search_profiles(queryset, query):
+    """Narrows a MemberProfile queryset to profiles whose document contains every term of ``query``."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        match = ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [match]))
+    if vendor == 'postgresql':
+        patterns = ['%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for term in terms]
+        where = ' AND '.join(['document ILIKE %s'] * len(patterns))
+        return queryset.filter(pk__in=RawSQL(f'SELECT profile_id FROM {TABLE} WHERE {where}', patterns))
+    for term in terms:
+        condition = Q()
+        for field in DOCUMENT_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        if term.isdigit() and len(term) <= MOBILE_SUFFIX_LENGTH:
+            condition |= Q(mobile__endswith=term)
+        queryset = queryset.filter(condition)
+    return queryset.distinct()
@@ -1,7 +1,18 @@
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Group
+from django.db.models.signals import post_migrate, post_save, post_delete
+from django.contrib.auth.models import Group, User
+from django.db import transaction
 from django.dispatch import receiver
 
+from . import events, imaging, search
+from .caching import invalidate_notifications, invalidate_reference_data
+from .jobs import enqueue
+from .models import (
+    MemberProfile, FamilyDetail, BirthDetail, ProfessionalDetail, ProfilePhoto, Notification, Shortlist, MutualInterest,
+    Caste, Koottam, Rasi, Star, Dhosam, Education, Profession,
+)
+
+REFERENCE_MODELS = (Caste, Koottam, Rasi, Star, Dhosam, Education, Profession)
+
 @receiver(post_migrate)
 def create_default_groups(sender, **kwargs):
     # run after auth migrations so Group model is available
@@ -9,4 +20,108 @@ def create_default_groups(sender, **kwargs):
         return
     groups = ['Admin', 'Manager', 'Member']
     for name in groups:
-        Group.objects.get_or_create(name=name)
\ No newline at end of file
+        Group.objects.get_or_create(name=name)
+
+
+@receiver(post_save, sender=FamilyDetail)
+@receiver(post_save, sender=BirthDetail)
+@receiver(post_save, sender=ProfessionalDetail)
+@receiver(post_delete, sender=FamilyDetail)
+@receiver(post_delete, sender=BirthDetail)
+@receiver(post_delete, sender=ProfessionalDetail)
+def refresh_profile_completeness(sender, instance, **kwargs):
+    # keep MemberProfile completeness flags in sync with its detail sections
+    MemberProfile.objects.filter(pk=instance.profile_id).refresh_completeness()
+
+
+@receiver(post_save, sender=ProfilePhoto)
+@receiver(post_delete, sender=ProfilePhoto)
+def touch_profile_on_photo_change(sender, instance, **kwargs):
+    # listing cards show the photo, so saved searches should report the profile as changed
+    MemberProfile.objects.filter(pk=instance.profile_id).touch()
+
+
+@receiver(post_delete, sender=ProfilePhoto)
+def delete_photo_renditions(sender, instance, **kwargs):
+    # renditions are derived from the photo and referenced nowhere else
+    imaging.delete_files(instance.rendition_files())
+
+
+@receiver(post_save, sender=Shortlist)
+def record_mutual_interest(sender, instance, created, using, **kwargs):
+    # Shortlist.objects.add() records the pair itself; this covers create(), save() and the admin
+    if created:
+        MutualInterest.objects.using(using).record(instance.member_id, instance.favorite_id)
+
+
+@receiver(post_delete, sender=Shortlist)
+def drop_mutual_interest(sender, instance, using, **kwargs):
+    # any delete path, including remove() and profile deletes cascading to the shortlist
+    MutualInterest.objects.using(using).between(instance.member_id, instance.favorite_id).delete()
+
+
+@receiver(post_save, sender=MemberProfile)
+def index_profile(sender, instance, **kwargs):
+    search.index_profiles([instance.pk])
+
+
+@receiver(post_delete, sender=MemberProfile)
+def unindex_profile(sender, instance, **kwargs):
+    search.remove_profiles([instance.pk])
+
+
+@receiver(post_save, sender=FamilyDetail)
+@receiver(post_save, sender=BirthDetail)
+@receiver(post_delete, sender=FamilyDetail)
+@receiver(post_delete, sender=BirthDetail)
+def index_profile_details(sender, instance, **kwargs):
+    # caste, koottam and place of birth are part of the search document
+    search.index_profiles([instance.profile_id])
+
+
+@receiver(post_save, sender=User)
+def profile_user_changed(sender, instance, update_fields=None, **kwargs):
+    # names are shown on the profile and part of its search document; logins only touch last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    profiles = MemberProfile.objects.filter(user=instance)
+    profiles.touch()
+    search.index_profiles(profiles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Caste)
+@receiver(post_save, sender=Koottam)
+def index_reference_profiles(sender, instance, created, **kwargs):
+    # renamed caste/koottam: rewrite the documents of the profiles using it
+    if created:
+        return
+    lookup = 'family_detail__caste' if sender is Caste else 'family_detail__koottam'
+    search.index_profiles(MemberProfile.objects.filter(**{lookup: instance}).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notifications_changed(sender, **kwargs):
+    # cached unread counts are keyed by a notifications version
+    invalidate_notifications()
+
+
+@receiver(post_save, sender=Notification)
+def queue_notification_delivery(sender, instance, created, **kwargs):
+    # targeted notifications are fanned out to their segment by the background worker
+    if instance.is_targeted and instance.delivery_status == Notification.DELIVERY_PENDING:
+        transaction.on_commit(lambda: enqueue('alliance.notifications.deliver_notification', notification_id=instance.pk))
+    elif created and not instance.is_targeted:
+        # global notifications reach every open events stream right away
+        event = {'type': 'notification', 'id': instance.pk, 'title': instance.title}
+        transaction.on_commit(lambda: events.publish(events.BROADCAST, event))
+
+
+def reference_data_changed(sender, **kwargs):
+    # lookup tables are cached by alliance.caching; drop the cached copy on any admin edit
+    invalidate_reference_data()
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_data_changed, sender=model, dispatch_uid=f'reference_data_saved_{model.__name__}')
+    post_delete.connect(reference_data_changed, sender=model, dispatch_uid=f'reference_data_deleted_{model.__name__}')
@@ -5,4 +5,13 @@ register = template.Library()
 @register.filter
 def get_primary(photos):
     """Returns the primary photo object if exists, else None."""
+    # use photos prefetched by MemberProfile.objects.with_listing_photos() instead of querying again
+    if 'photos' in getattr(photos.instance, '_prefetched_objects_cache', {}):
+        return next((photo for photo in photos.all() if photo.is_primary), None)
     return photos.filter(is_primary=True).first()
+
+
+@register.filter
+def rendition(photo, width):
+    """URL of the smallest rendition of ``photo`` covering ``width`` px (rendered size x pixel density)."""
+    return photo.rendition_url(int(width))
\ No newline at end of file
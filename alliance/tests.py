@@ -1,3 +1,268 @@
-from django.test import TestCase
+import base64
+import itertools
+import re
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from io import BytesIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .imaging import generate_renditions, process_photo
+from .notifications import deliver_notification
+from .pagination import PAGE_SIZE, encode_cursor, keyset_page, ranked_page
+from .models import (
+    BirthDetail, FamilyDetail, MemberProfile, MutualInterest, Notification, ProfessionalDetail, ProfilePhoto, Rasi,
+    SavedSearch, Shortlist, Star,
+)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'uses SQLite EXPLAIN QUERY PLAN output')
+class PartnerSearchQueryPlanTests(TestCase):
+    """Every supported partner-search filter combination must be answered through indexes."""
+
+    CRITERIA = {
+        'dob_before': date(2000, 1, 1),
+        'dob_after': date(1990, 1, 1),
+        'caste': 1,
+        'koottam': 1,
+        'education': 1,
+        'profession': 1,
+        'income_min': 10000,
+        'income_max': 50000,
+    }
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_filter_combinations_do_not_scan_tables(self):
+        names = list(self.CRITERIA)
+        for size in range(len(names) + 1):
+            for combo in itertools.combinations(names, size):
+                criteria = {name: self.CRITERIA[name] for name in combo}
+                qs = (
+                    MemberProfile.objects.filter(gender='F').complete()
+                    .matching_preferences(**criteria)
+                    .order_by('created_at', 'pk')
+                )
+                plan = self.query_plan(qs)
+                scans = [step for step in plan if re.match(r'SCAN alliance_', step)]
+                with self.subTest(filters=combo):
+                    self.assertEqual(scans, [], plan)
+
+
+class ProfilePhotoRenditionTests(TestCase):
+    """Building renditions must not disturb the photo's other fields or leave stale files behind."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        user = User.objects.create_user(username='9876543210', first_name='Test')
+        profile = MemberProfile.objects.create(user=user, mobile='9876543210', gender='F')
+        buf = BytesIO()
+        Image.new('RGB', (1200, 900), 'teal').save(buf, 'JPEG')
+        self.photo = ProfilePhoto.objects.create(
+            profile=profile, image=ContentFile(buf.getvalue(), name='photo.jpg'), is_primary=True
+        )
+
+    def test_renditions_keep_primary_flag(self):
+        generate_renditions(self.photo)
+        self.photo.refresh_from_db()
+        self.assertTrue(self.photo.is_primary)
+        self.assertTrue(self.photo.image_small)
+
+    def test_worker_job_keeps_primary_flag(self):
+        process_photo(self.photo.pk)
+        self.photo.refresh_from_db()
+        self.assertTrue(self.photo.is_primary)
+        self.assertEqual(self.photo.status, ProfilePhoto.STATUS_READY)
+
+    def test_old_renditions_are_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_renditions(self.photo)
+        first = self.photo.rendition_files()
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_renditions(self.photo)
+        self.assertFalse(any(storage.exists(name) for storage, name in first))
+        second = self.photo.rendition_files()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.photo.delete()
+        self.assertFalse(any(storage.exists(name) for storage, name in second))
+
+
+class MutualInterestTests(TestCase):
+    """The materialized pairs follow every way a shortlist row is created or deleted."""
+
+    def setUp(self):
+        self.a, self.b = (
+            MemberProfile.objects.create(user=User.objects.create_user(username=mobile), mobile=mobile, gender=gender)
+            for mobile, gender in (('9876500001', 'M'), ('9876500002', 'F'))
+        )
+
+    def test_create_and_delete(self):
+        Shortlist.objects.create(member=self.a, favorite=self.b)
+        reverse = Shortlist.objects.create(member=self.b, favorite=self.a)
+        self.assertEqual(MutualInterest.objects.between(self.a.pk, self.b.pk).count(), 2)
+        reverse.delete()
+        self.assertFalse(MutualInterest.objects.between(self.a.pk, self.b.pk).exists())
+
+    def test_add_and_remove(self):
+        Shortlist.objects.add(self.a.pk, self.b.pk)
+        Shortlist.objects.add(self.b.pk, self.a.pk)
+        self.assertEqual(MutualInterest.objects.between(self.a.pk, self.b.pk).count(), 2)
+        Shortlist.objects.remove(self.a.pk, self.b.pk)
+        self.assertFalse(MutualInterest.objects.between(self.a.pk, self.b.pk).exists())
+
+
+def create_member(mobile, gender, star=None):
+    """A member with all three profile sections filled in, so it is a complete match candidate."""
+    profile = MemberProfile.objects.create(
+        user=User.objects.create_user(username=mobile, first_name='Member'), mobile=mobile, gender=gender
+    )
+    FamilyDetail.objects.create(profile=profile, kula_deity='Deity')
+    BirthDetail.objects.create(profile=profile, star=star, rasi=star.rasi if star else None, place_of_birth='Erode')
+    ProfessionalDetail.objects.create(profile=profile, monthly_income=20000)
+    return profile
+
+
+@override_settings(PORUTHAM_MIN_SCORE=0)
+class MatchFeedTests(TestCase):
+    """Matches feed ordering and cursors for the default and the porutham sort."""
+
+    def setUp(self):
+        cache.clear()
+        taurus = Rasi.objects.create(rasi='Taurus')
+        stars = [Star.objects.create(star=name, rasi=taurus) for name in ('Ashwini', 'Bharani', 'Magam', 'Revathi')]
+        self.viewer = create_member('9000000000', 'M', Star.objects.create(star='Rohini', rasi=taurus))
+        self.candidates = [
+            create_member(f'9100000{n:03d}', 'F', stars[n % len(stars)]) for n in range(PAGE_SIZE + 6)
+        ]
+        self.client.force_login(self.viewer.user)
+
+    def feed(self, **params):
+        response = self.client.get('/matches/feed/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_stale_cached_ranking_skips_removed_candidates(self):
+        first = self.feed(sort='compatibility')
+        ranked_ids = [card['id'] for card in first['results']]
+        second = self.feed(sort='compatibility', cursor=first['next_cursor'])
+        gone = second['results'][0]['id']
+        # no longer complete, so no longer a candidate, while the cached ranking still lists it
+        FamilyDetail.objects.filter(profile_id=gone).delete()
+        stale = self.feed(sort='compatibility', cursor=first['next_cursor'])
+        ids = [card['id'] for card in stale['results']]
+        self.assertNotIn(gone, ids)
+        self.assertEqual(len(ids), len(second['results']) - 1)
+        self.assertFalse(set(ids) & set(ranked_ids))
+
+    def test_default_sort_is_newest_first(self):
+        first = self.feed()
+        second = self.feed(cursor=first['next_cursor'])
+        ids = [card['id'] for card in first['results'] + second['results']]
+        newest_first = list(
+            MemberProfile.objects.filter(gender='F').order_by('-created_at', '-pk').values_list('pk', flat=True)
+        )
+        self.assertEqual(ids, newest_first)
+        self.assertIsNone(second['next_cursor'])
+
+
+class KeysetPaginationTests(TestCase):
+    """keyset_page and ranked_page walk every row once, in order, across cursors."""
+
+    def setUp(self):
+        # two rows share a created_at so the pk tie-break is exercised
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for n, minutes in enumerate((0, 1, 1, 2, 3)):
+            mobile = f'980000000{n}'
+            profile = MemberProfile.objects.create(user=User.objects.create_user(username=mobile), mobile=mobile, gender='F')
+            MemberProfile.objects.filter(pk=profile.pk).update(created_at=base + timedelta(minutes=minutes))
+        self.ordered = list(MemberProfile.objects.order_by('created_at', 'pk').values_list('pk', flat=True))
+
+    def walk(self, page, **kwargs):
+        pages, cursor = [], None
+        while True:
+            items, cursor = page(cursor=cursor, page_size=2, **kwargs)
+            pages.append([item[-1] if isinstance(item, tuple) else item.pk for item in items])
+            if cursor is None:
+                return pages
+
+    def test_keyset_page_ascending(self):
+        pages = self.walk(partial(keyset_page, MemberProfile.objects.all()))
+        self.assertEqual(pages, [self.ordered[:2], self.ordered[2:4], self.ordered[4:]])
+
+    def test_keyset_page_descending(self):
+        pages = self.walk(partial(keyset_page, MemberProfile.objects.all()), descending=True)
+        newest_first = self.ordered[::-1]
+        self.assertEqual(pages, [newest_first[:2], newest_first[2:4], newest_first[4:]])
+
+    def test_keyset_page_last_page_has_no_cursor(self):
+        items, cursor = keyset_page(MemberProfile.objects.all(), page_size=len(self.ordered))
+        self.assertEqual([p.pk for p in items], self.ordered)
+        self.assertIsNone(cursor)
+
+    def test_ranked_page_follows_ranking(self):
+        profiles = MemberProfile.objects.in_bulk()
+        # best score first, then oldest first
+        entries = sorted(
+            ((pk % 3, profiles[pk].created_at, pk) for pk in self.ordered),
+            key=lambda entry: (-entry[0], entry[1], entry[2]),
+        )
+        pages = self.walk(partial(ranked_page, entries))
+        self.assertEqual(sum(pages, []), [pk for _, _, pk in entries])
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+    def test_malformed_cursors_are_rejected(self):
+        naive = base64.urlsafe_b64encode(b'2024-01-01T00:00:00|1').decode()
+        naive_ranked = base64.urlsafe_b64encode(b'[1, "2024-01-01T00:00:00", 1]').decode()
+        for cursor in ('not a cursor', encode_cursor(MemberProfile.objects.first())[:-4], naive, naive_ranked):
+            with self.assertRaises(ValueError):
+                keyset_page(MemberProfile.objects.all(), cursor)
+            with self.assertRaises(ValueError):
+                ranked_page([], cursor)
+
+    def test_saved_search_seen_rejects_naive_cursor(self):
+        self.client.force_login(User.objects.get(username='9800000000'))
+        profile = MemberProfile.objects.get(mobile='9800000000')
+        saved = SavedSearch.objects.create(member=profile, name='Any', criteria={}, seen_until=datetime.now(timezone.utc))
+        naive = base64.urlsafe_b64encode(b'2030-01-01T00:00:00|1').decode()
+        response = self.client.post(reverse('saved_search_seen', args=[saved.pk]), {'cursor': naive}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class TargetedNotificationTests(TestCase):
+    """A targeted notification counts as unread when its delivery finishes, not when it was written."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = create_member('9700000000', 'F')
+        self.client.force_login(self.member.user)
+
+    def test_late_delivery_is_unread(self):
+        targeted = Notification.objects.create(title='For women', message='Targeted', target_gender='F')
+        self.assertIsNone(targeted.published_at)
+        Notification.objects.create(title='For everyone', message='Global')
+        # the member opens the inbox before the targeted one is delivered
+        first = self.client.get(reverse('notifications'))
+        self.assertEqual([n.title for n in first.context['notifications']], ['For everyone'])
+        self.assertEqual(self.client.get(reverse('notifications_unread')).json(), {'unread': 0})
+
+        self.assertEqual(deliver_notification(targeted.pk), 1)
+        self.assertEqual(self.client.get(reverse('notifications_unread')).json(), {'unread': 1})
+        inbox = self.client.get(reverse('notifications')).context['notifications']
+        self.assertEqual([(n.title, n.is_unread) for n in inbox], [('For women', True), ('For everyone', False)])
@@ -1,19 +1,39 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# async variants of the read-heavy pages when running under ASGI
+if settings.ASYNC_VIEWS:
+    from . import views_async as read_views
+else:
+    read_views = views
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('privacy-policy/', views.privacy_policy, name='privacy_policy'),
     path('register/', views.register, name='register'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('matches/', views.matches, name='matches'),
-    path('shortlisted/', views.shortlisted, name='shortlisted'),
-    path('notifications/', views.notifications, name='notifications'),
+    path('matches/', read_views.matches, name='matches'),
+    path('matches/feed/', views.matches_feed, name='matches_feed'),
+    path('matches/searches/save/', views.saved_search_create, name='saved_search_create'),
+    path('matches/searches/<int:pk>/', views.saved_search_updates, name='saved_search_updates'),
+    path('matches/searches/<int:pk>/feed/', views.saved_search_updates_feed, name='saved_search_updates_feed'),
+    path('matches/searches/<int:pk>/seen/', views.saved_search_seen, name='saved_search_seen'),
+    path('matches/searches/<int:pk>/delete/', views.saved_search_delete, name='saved_search_delete'),
+    path('search/', views.profile_search, name='profile_search'),
+    path('shortlisted/', read_views.shortlisted, name='shortlisted'),
+    path('mutual/', views.mutual_matches, name='mutual_matches'),
+    path('mutual/feed/', views.mutual_matches_feed, name='mutual_matches_feed'),
+    path('notifications/', read_views.notifications, name='notifications'),
+    path('notifications/unread/', views.notifications_unread, name='notifications_unread'),
+    path('events/', views.event_stream, name='event_stream'),
     path('profile/', views.profile, name='profile'),
-    path('profile/<int:pk>/', views.profile_detail, name='profile_detail'),
+    path('profile/sections/<str:section>/', views.profile_section, name='profile_section'),
+    path('profile/<int:pk>/', read_views.profile_detail, name='profile_detail'),
     path('profile/<int:pk>/favorite/', views.shortlist_add, name='shortlist_add'),
     path('profile/<int:pk>/unfavorite/', views.shortlist_remove, name='shortlist_remove'),
+    path('profile/<int:pk>/favorite/toggle/', views.shortlist_toggle, name='shortlist_toggle'),
     path('profile/photos/upload/', views.profile_photo_upload, name='profile_photo_upload'),
     path('profile/photos/<int:pk>/set_primary/', views.profile_photo_set_primary, name='profile_photo_set_primary'),
     path('profile/photos/<int:pk>/delete/', views.profile_photo_delete, name='profile_photo_delete'),
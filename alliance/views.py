@@ -4,28 +4,53 @@ from django.contrib.auth import authenticate, login as auth_login, logout as aut
 from django.urls import reverse
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import require_POST
+from django.utils import timezone
+from django.conf import settings
 
 from .models import (
     MemberProfile,
     FamilyDetail,
     BirthDetail,
     ProfessionalDetail,
-    Caste,
-    Koottam,
-    Dhosam,
-    Rasi,
-    Star,
-    Education,
-    Profession,
     ProfilePhoto,
     Notification,
+    MutualInterest,
+    SavedSearch,
     Shortlist
 )
+from .caching import (
+    MATCH_RANKING_TIMEOUT,
+    PROFILE_FRAGMENT_TIMEOUT,
+    get_reference_data,
+    get_shortlisted_ids,
+    invalidate_shortlisted_ids,
+    match_ranking_key,
+    profile_fragment_key,
+    unread_notification_count,
+)
+from .forms import PartnerSearchForm, normalize_mobile, validate_member_name
+from .jobs import enqueue
+from .pagination import PAGE_SIZE, decode_cursor, encode_cursor, keyset_page, ranked_page
+from . import events, porutham, search
+from .porutham import get_porutham_index
 from datetime import datetime, date
-import re
+import asyncio
+import json
 
 from django.shortcuts import get_object_or_404
 
+NOTIFICATIONS_PAGE_SIZE = 20
+# candidate columns scored by PoruthamIndex.rank()
+RANKING_FIELDS = ('pk', 'birth_detail__star_id', 'birth_detail__rasi_id', 'birth_detail__dhosam_id', 'created_at')
+
 def home(request):
     return render(request, 'main/home.html')
 
@@ -47,29 +72,13 @@ def register(request):
         gender = request.POST.get('gender', '').strip()
 
         # Server-side validation
-        name_pattern = re.compile(r'^[A-Z][a-zA-Z]*$')
-        if not first_name or not name_pattern.match(first_name):
-            return render(request, 'main/register.html', {'error': 'First name must start with a capital letter and contain letters only.'})
-        if last_name and not name_pattern.match(last_name):
-            return render(request, 'main/register.html', {'error': 'Last name must start with a capital letter and contain letters only.'})
-        if not mobile:
-            return render(request, 'main/register.html', {'error': 'Mobile number is required.'})
-
-        # Normalize mobile: strip non-digits, handle optional +91/91/0 prefixes
-        digits = re.sub(r'\D', '', mobile)
-        # If starts with country code 91 or leading 0, take last 10 digits
-        if len(digits) > 10:
-            digits = digits[-10:]
-
-        if len(digits) != 10:
-            return render(request, 'main/register.html', {'error': 'Mobile number must contain 10 digits (optionally prefixed with +91 or 0).'} )
-
-        # Indian mobile numbers should start with 6-9
-        if digits[0] not in '6789':
-            return render(request, 'main/register.html', {'error': 'Invalid Indian mobile number. It should start with 6,7,8, or 9.'})
-
-        # use normalized 10-digit mobile as canonical username
-        mobile = digits
+        try:
+            validate_member_name(first_name, 'First name')
+            validate_member_name(last_name, 'Last name', required=False)
+            # use normalized 10-digit mobile as canonical username
+            mobile = normalize_mobile(mobile)
+        except ValidationError as exc:
+            return render(request, 'main/register.html', {'error': exc.messages[0]})
 
         if User.objects.filter(username=mobile).exists():
             messages.error(request, 'A user with this mobile already exists. Please login.')
@@ -121,15 +130,20 @@ def logout_view(request):
     return redirect('home')
 
 
-@login_required
-def matches(request):
-    # show opposite-gender members
-    try:
-        profile = request.user.profile
-        my_gender = profile.gender
-    except MemberProfile.DoesNotExist:
-        my_gender = None
+def _shortlisted_ids(request):
+    """Profile ids the viewer has shortlisted, loaded at most once per request (see caching.get_shortlisted_ids)."""
+    if not hasattr(request, '_shortlisted_ids'):
+        try:
+            member_id = request.user.profile.pk
+        except (AttributeError, MemberProfile.DoesNotExist):
+            member_id = None
+        request._shortlisted_ids = get_shortlisted_ids(member_id) if member_id else frozenset()
+    return request._shortlisted_ids
+
 
+def _candidates(user, profile):
+    """Queryset of complete opposite-gender profiles for ``user`` (``profile`` may be None); runs no query."""
+    my_gender = profile.gender if profile else None
     if my_gender == 'M':
         target_gender = 'F'
     elif my_gender == 'F':
@@ -137,53 +151,336 @@ def matches(request):
     else:
         target_gender = None
 
-    # helper to determine if a profile has filled required sections
-    def is_profile_complete(p: MemberProfile):
-        try:
-            fd = p.family_detail
-            bd = p.birth_detail
-            pd = p.professional_detail
-        except (FamilyDetail.DoesNotExist, BirthDetail.DoesNotExist, ProfessionalDetail.DoesNotExist):
-            return False
+    qs = MemberProfile.objects.exclude(user=user)
+    if target_gender:
+        qs = qs.filter(gender=target_gender)
 
-        # require at least one meaningful field in each section
-        family_filled = any([fd.father_name, fd.mother_name, fd.siblings, fd.caste_id, fd.koottam_id, fd.kula_deity])
-        birth_filled = any([bd.date_of_birth, bd.time_of_birth, bd.place_of_birth, bd.rasi_id, bd.star_id])
-        prof_filled = any([pd.education_id, pd.profession_id, pd.monthly_income])
+    # filter only fully completed profiles (stored flag, indexed together with gender)
+    return qs.complete()
 
-        return family_filled and birth_filled and prof_filled
 
-    # if current user's profile is not complete, prompt them to fill it
+def _viewer_profile(request):
     try:
-        me_profile = request.user.profile
-        me_complete = is_profile_complete(me_profile)
+        return request.user.profile
     except MemberProfile.DoesNotExist:
-        me_profile = None
-        me_complete = False
+        return None
 
-    qs = MemberProfile.objects.exclude(user=request.user)
-    if target_gender:
-        qs = qs.filter(gender=target_gender)
 
-    # filter only fully completed profiles
-    profiles = [p for p in qs if is_profile_complete(p)]
+def _match_queryset(request):
+    """Returns (queryset of complete opposite-gender profiles, whether the viewer's profile is complete)."""
+    profile = _viewer_profile(request)
+    return _candidates(request.user, profile), bool(profile and profile.is_complete)
+
+
+def _viewer_birth(profile):
+    """Returns the viewer's (star_id, rasi_id, dhosam_id) when porutham ranking applies, else None."""
+    if profile is None or profile.gender not in ('M', 'F'):
+        return None
+    try:
+        bd = profile.birth_detail
+    except BirthDetail.DoesNotExist:
+        return None
+    if not bd.star_id:
+        return None
+    return bd.star_id, bd.rasi_id, bd.dhosam_id
+
+
+def _match_sort(request, viewer):
+    """'compatibility' when porutham ranking is requested and the viewer has a birth star, else 'recent'.
+
+    Ranking leaves out candidates without a known star and failing pairs, so it is never the default.
+    """
+    return 'compatibility' if request.GET.get('sort') == 'compatibility' and viewer else 'recent'
+
+
+def _rank_matches(profile, viewer, rows):
+    """Porutham ranking of candidate ``rows`` (RANKING_FIELDS) for the viewer, as (score, created_at, pk)."""
+    return get_porutham_index().rank(viewer, profile.gender == 'F', rows, min_score=settings.PORUTHAM_MIN_SCORE)
+
+
+def _ranked_profiles(by_pk, entries):
+    """Profiles for ranked (score, created_at, pk) entries, in rank order, annotated with their porutham score.
+
+    A cached ranking can name profiles that have since been deleted or stopped being candidates; they are skipped.
+    """
+    profiles = []
+    for score, _, pk in entries:
+        p = by_pk.get(pk)
+        if p is None:
+            continue
+        p.porutham = score
+        profiles.append(p)
+    return profiles
+
+
+def _match_page(request, cursor=None):
+    """Returns one page of matches as a dict of profiles, next_cursor, me_complete, sort and the search form.
+
+    Partner-preference filters from PartnerSearchForm narrow the candidates
+    first. By default they are the newest registrations first, in keyset order; with
+    ?sort=compatibility and a known birth star they are ranked by porutham
+    score (scored in bulk from a single values query, cached for later pages).
+    Raises ValueError for a malformed cursor.
+    """
+    profile = _viewer_profile(request)
+    qs = _candidates(request.user, profile)
+    form = PartnerSearchForm(request.GET)
+    criteria = form.criteria() if form.is_valid() else {}
+    if criteria:
+        qs = qs.matching_preferences(**criteria)
+    viewer = _viewer_birth(profile)
+    sort = _match_sort(request, viewer)
+    if sort == 'compatibility':
+        # the first page re-ranks; later pages reuse that ranking instead of scoring every candidate again
+        key = match_ranking_key(profile.pk, viewer, criteria)
+        ranked = cache.get(key) if cursor else None
+        if ranked is None:
+            ranked = _rank_matches(profile, viewer, qs.values_list(*RANKING_FIELDS))
+            cache.set(key, ranked, MATCH_RANKING_TIMEOUT)
+        entries, next_cursor = ranked_page(ranked, cursor)
+        by_pk = qs.with_listing_photos().in_bulk([pk for _, _, pk in entries])
+        profiles = _ranked_profiles(by_pk, entries)
+    else:
+        profiles, next_cursor = keyset_page(qs.with_listing_photos(), cursor, descending=True)
+    return {
+        'profiles': profiles,
+        'next_cursor': next_cursor,
+        'me_complete': bool(profile and profile.is_complete),
+        'sort': sort,
+        'form': form,
+    }
+
+
+def _profile_card(p, shortlisted_ids=frozenset()):
+    """Serializes the fields shown on a listing card."""
+    photo = p.listing_photo()
+    return {
+        'id': p.pk,
+        'url': reverse('profile_detail', args=[p.pk]),
+        'name': f"{p.user.first_name} {p.user.last_name}".strip(),
+        'mobile': f"XXXXXX{p.mobile[6:10]}",
+        'gender': p.gender,
+        'gender_display': p.get_gender_display(),
+        'photo': photo.rendition_url(120) if photo else None,
+        'porutham': getattr(p, 'porutham', None),
+        'favorited': p.pk in shortlisted_ids,
+    }
+
+
+def _matches_context(request, page, saved_searches, shortlisted_ids):
+    # current search filters, carried over to the sort links and the feed
+    filters = request.GET.copy()
+    for key in ('sort', 'cursor'):
+        filters.pop(key, None)
+    return {
+        **page,
+        'filter_query': filters.urlencode(),
+        'porutham_max': porutham.MAX_SCORE,
+        'saved_searches': saved_searches,
+        'shortlisted_ids': shortlisted_ids,
+        'can_save_search': len(saved_searches) < SavedSearch.MAX_PER_MEMBER,
+    }
+
+
+@login_required
+def matches(request):
+    # show opposite-gender members; further pages are loaded from matches_feed
+    page = _match_page(request)
+    saved_searches = []
+    if hasattr(request.user, 'profile'):
+        for saved in request.user.profile.saved_searches.all():
+            saved.new_count = _saved_search_changes(request, saved).count()
+            saved_searches.append(saved)
+    return render(request, 'main/matches.html', _matches_context(request, page, saved_searches, _shortlisted_ids(request)))
+
+
+@login_required
+def matches_feed(request):
+    # JSON pages of matches for infinite scroll and the partner search API, continuing from ?cursor=
+    try:
+        page = _match_page(request, request.GET.get('cursor'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    if page['form'].errors:
+        return JsonResponse({'error': 'Invalid search filters.', 'errors': page['form'].errors}, status=400)
+    return JsonResponse({'results': [_profile_card(p, _shortlisted_ids(request)) for p in page['profiles']], 'next_cursor': page['next_cursor']})
+
+
+def _saved_search_filter(candidates, saved, after=None):
+    """Narrows ``candidates`` to a saved search's matches changed after ``after`` ((updated_at, pk), default
+    the search's watermark), oldest change first."""
+    form = PartnerSearchForm(saved.criteria)
+    if form.is_valid():
+        candidates = candidates.matching_preferences(**form.criteria())
+    return candidates.changed_since(*(after or (saved.seen_until, saved.seen_until_id)))
+
+
+def _saved_search_changes(request, saved, after=None):
+    qs, _ = _match_queryset(request)
+    return _saved_search_filter(qs, saved, after)
+
 
-    return render(request, 'main/matches.html', {'profiles': profiles, 'me_complete': me_complete})
+def _saved_search_updates(request, pk):
+    """Returns (saved search, profiles, next_cursor) for the batch of changes after ?cursor= (default: the watermark).
+
+    Reading never moves the watermark, so prefetches and reloads do not skip updates; saved_search_seen does.
+    Raises ValueError for a malformed cursor.
+    """
+    saved = get_object_or_404(SavedSearch, pk=pk, member__user=request.user)
+    cursor = request.GET.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    profiles = list(_saved_search_changes(request, saved, after).with_listing_photos()[:PAGE_SIZE + 1])
+    next_cursor = None
+    if len(profiles) > PAGE_SIZE:
+        profiles = profiles[:PAGE_SIZE]
+        next_cursor = encode_cursor(profiles[-1], 'updated_at')
+    return saved, profiles, next_cursor
+
+
+@login_required
+@require_POST
+def saved_search_create(request):
+    # Save the current partner-preference filters; only later registrations/changes count as new
+    profile = get_object_or_404(MemberProfile, user=request.user)
+    form = PartnerSearchForm(QueryDict(request.POST.get('query', '')))
+    name = request.POST.get('name', '').strip()[:100]
+    if profile.saved_searches.count() >= SavedSearch.MAX_PER_MEMBER:
+        messages.error(request, f"You can save up to {SavedSearch.MAX_PER_MEMBER} searches.")
+    elif not form.is_valid():
+        messages.error(request, 'Please correct the search filters before saving.')
+    else:
+        criteria = {field: value for field, value in form.data.items() if field in form.fields and value}
+        SavedSearch.objects.create(member=profile, name=name or 'My search', criteria=criteria, seen_until=timezone.now())
+        messages.success(request, 'Search saved. New matches will be shown here.')
+    return redirect('matches')
+
+
+@login_required
+@require_POST
+def saved_search_delete(request, pk):
+    SavedSearch.objects.filter(pk=pk, member__user=request.user).delete()
+    messages.success(request, 'Saved search removed.')
+    return redirect('matches')
+
+
+@login_required
+def saved_search_updates(request, pk):
+    # New or changed matches since the member last marked this saved search as seen
+    try:
+        saved, profiles, next_cursor = _saved_search_updates(request, pk)
+    except ValueError:
+        return redirect('saved_search_updates', pk=pk)
+    return render(request, 'main/saved_search_updates.html', {
+        'search': saved,
+        'profiles': profiles,
+        'next_cursor': next_cursor,
+        'seen_cursor': encode_cursor(profiles[-1], 'updated_at') if profiles else None,
+        'shortlisted_ids': _shortlisted_ids(request),
+    })
+
+
+@login_required
+def saved_search_updates_feed(request, pk):
+    # JSON variant of saved_search_updates, continuing from ?cursor=; POST seen_cursor to saved_search_seen once shown
+    try:
+        saved, profiles, next_cursor = _saved_search_updates(request, pk)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({
+        'results': [_profile_card(p, _shortlisted_ids(request)) for p in profiles],
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
+        'seen_cursor': encode_cursor(profiles[-1], 'updated_at') if profiles else None,
+    })
+
+
+@login_required
+@require_POST
+def saved_search_seen(request, pk):
+    # Move the watermark up to the update named by POST cursor; JSON for callers that ask for it, else back to the updates
+    saved = get_object_or_404(SavedSearch, pk=pk, member__user=request.user)
+    try:
+        seen = decode_cursor(request.POST.get('cursor', ''))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    # never move backwards, e.g. when an older tab acknowledges late
+    if seen > (saved.seen_until, saved.seen_until_id):
+        saved.seen_until, saved.seen_until_id = seen
+        saved.save(update_fields=['seen_until', 'seen_until_id'])
+    if request.accepts('text/html'):
+        return redirect('saved_search_updates', pk=saved.pk)
+    return JsonResponse({'seen_until': saved.seen_until.isoformat(), 'seen_until_id': saved.seen_until_id})
+
+
+@login_required
+def profile_search(request):
+    # JSON name/mobile-suffix/place search over the viewer's possible matches, via the trigram index
+    query = request.GET.get('q', '').strip()
+    if not search.search_terms(query):
+        return JsonResponse({'error': f'Enter at least {search.MIN_TERM_LENGTH} characters.'}, status=400)
+    qs, _ = _match_queryset(request)
+    profiles = search.search_profiles(qs, query).with_listing_photos().order_by('-created_at', '-pk')[:PAGE_SIZE]
+    return JsonResponse({'results': [_profile_card(p, _shortlisted_ids(request)) for p in profiles]})
 
 
 @login_required
 def shortlisted(request):
     # List profiles favorited by the current user
     profile = request.user.profile
-    favorites = MemberProfile.objects.filter(favorited_by__member=profile)
-    return render(request, 'main/shortlisted.html', {'profiles': favorites})
+    favorites = MemberProfile.objects.filter(favorited_by__member=profile).with_listing_photos()
+    return render(request, 'main/shortlisted.html', {'profiles': favorites, 'shortlisted_ids': _shortlisted_ids(request)})
+
+
+def _mutual_matches(request, cursor=None):
+    """Returns (profiles, next_cursor) for one keyset page of the members who shortlisted the viewer back, most
+    recent pair first, read from the materialized MutualInterest rows; raises ValueError for a malformed cursor."""
+    rows = MutualInterest.objects.filter(member=request.user.profile).select_related('match__user').prefetch_related(
+        Prefetch('match__photos', queryset=ProfilePhoto.objects.order_by('-is_primary', 'uploaded_at', 'pk'))
+    )
+    items, next_cursor = keyset_page(rows, cursor, descending=True)
+    return [row.match for row in items], next_cursor
+
+
+@login_required
+def mutual_matches(request):
+    # profiles where both members shortlisted each other, one page at a time
+    try:
+        profiles, next_cursor = _mutual_matches(request, request.GET.get('cursor'))
+    except ValueError:
+        profiles, next_cursor = _mutual_matches(request)
+    return render(request, 'main/mutual_matches.html', {
+        'profiles': profiles,
+        'next_cursor': next_cursor,
+        'shortlisted_ids': _shortlisted_ids(request),
+    })
+
+
+@login_required
+def mutual_matches_feed(request):
+    # JSON pages of mutual matches, continuing from ?cursor=
+    try:
+        profiles, next_cursor = _mutual_matches(request, request.GET.get('cursor'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'results': [_profile_card(p, _shortlisted_ids(request)) for p in profiles], 'next_cursor': next_cursor})
+
+
+def _shortlisted(request, member, pk):
+    """Bookkeeping after ``member`` shortlisted profile ``pk``: cache invalidation and the live alert."""
+    invalidate_shortlisted_ids(member.pk)
+    events.publish(events.member_channel(pk), {
+        'type': 'shortlisted',
+        'name': f"{request.user.first_name} {request.user.last_name}".strip(),
+        'url': reverse('profile_detail', args=[member.pk]),
+    })
+
+
 @login_required
 def shortlist_add(request, pk):
     # Add a profile to favorites
     member = request.user.profile
-    favorite = get_object_or_404(MemberProfile, pk=pk)
-    if member != favorite and not Shortlist.objects.filter(member=member, favorite=favorite).exists():
-        Shortlist.objects.create(member=member, favorite=favorite)
+    if Shortlist.objects.add(member.pk, pk):
+        _shortlisted(request, member, pk)
         messages.success(request, "Profile added to favorites.")
     return redirect('profile_detail', pk=pk)
 
@@ -191,16 +488,197 @@ def shortlist_add(request, pk):
 def shortlist_remove(request, pk):
     # Remove a profile from favorites
     member = request.user.profile
-    favorite = get_object_or_404(MemberProfile, pk=pk)
-    Shortlist.objects.filter(member=member, favorite=favorite).delete()
+    if Shortlist.objects.remove(member.pk, pk):
+        invalidate_shortlisted_ids(member.pk)
     messages.success(request, "Profile removed from favorites.")
     return redirect('profile_detail', pk=pk)
 
 
+@login_required
+@require_POST
+def shortlist_toggle(request, pk):
+    # JSON: set favorite state from POST favorited=1/0 (idempotent), one INSERT or DELETE on the common path
+    member = get_object_or_404(MemberProfile, user=request.user)
+    favorited = request.POST.get('favorited') in ('1', 'true')
+    if favorited:
+        changed = Shortlist.objects.add(member.pk, pk)
+        # nothing inserted: either already shortlisted or not a valid target
+        if not changed and not Shortlist.objects.filter(member=member, favorite_id=pk).exists():
+            return JsonResponse({'error': 'Profile not found.'}, status=404)
+        if changed:
+            _shortlisted(request, member, pk)
+    else:
+        changed = Shortlist.objects.remove(member.pk, pk)
+        if changed:
+            invalidate_shortlisted_ids(member.pk)
+    return JsonResponse({'favorited': favorited, 'changed': changed})
+
+
 @login_required
 def notifications(request):
-    notifications = Notification.objects.all().order_by('-created_at')
-    return render(request, 'main/notifications.html', {'notifications': notifications})
+    # newest published first, one keyset page at a time; opening the first page marks everything up to it as seen
+    cursor = request.GET.get('cursor')
+    try:
+        profile = request.user.profile
+        inbox = Notification.objects.for_member(profile.pk)
+    except MemberProfile.DoesNotExist:
+        profile = None
+        inbox = Notification.objects.filter(is_targeted=False)
+    try:
+        items, next_cursor = keyset_page(inbox, cursor, NOTIFICATIONS_PAGE_SIZE, descending=True, field='published_at')
+    except ValueError:
+        cursor = None
+        items, next_cursor = keyset_page(inbox, None, NOTIFICATIONS_PAGE_SIZE, descending=True, field='published_at')
+    seen_at = profile.notifications_seen_at if profile else None
+    for n in items:
+        n.is_unread = profile is not None and (seen_at is None or n.published_at > seen_at)
+    if profile and not cursor and items and (seen_at is None or items[0].published_at > seen_at):
+        MemberProfile.objects.filter(pk=profile.pk).update(notifications_seen_at=items[0].published_at)
+        profile.notifications_seen_at = items[0].published_at
+    return render(request, 'main/notifications.html', {'notifications': items, 'next_cursor': next_cursor})
+
+
+async def event_stream(request):
+    # Server-Sent Events: notifications and "someone shortlisted you" alerts (needs an ASGI server)
+    if not isinstance(request, ASGIRequest):
+        # a WSGI worker cannot hold the stream open; 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    member_id = await MemberProfile.objects.filter(user=user).values_list('pk', flat=True).afirst()
+    channels = [events.BROADCAST] + ([events.member_channel(member_id)] if member_id else [])
+    heartbeat = getattr(settings, 'EVENTS_HEARTBEAT', 25)
+
+    async def stream():
+        yield 'retry: 5000\n\n'
+        async with events.get_broker().subscribe(channels) as queue:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                # targeted notifications arrive on the member channel only, so every event here is for this member
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def notifications_unread(request):
+    # cheap badge count for polling clients; served from the per-member cache
+    try:
+        profile = request.user.profile
+    except MemberProfile.DoesNotExist:
+        return JsonResponse({'unread': 0})
+    return JsonResponse({'unread': unread_notification_count(profile.pk, profile.notifications_seen_at)})
+
+
+def _reference_choice(objects, raw_id):
+    """The cached reference row whose pk is the posted ``raw_id``, or None when it is blank or unknown."""
+    try:
+        pk = int(raw_id)
+    except (TypeError, ValueError):
+        return None
+    return next((obj for obj in objects if obj.pk == pk), None)
+
+
+def _save_member_section(request, profile):
+    first = request.POST.get('first_name', '').strip()
+    last = request.POST.get('last_name', '').strip()
+    mobile = request.POST.get('mobile', '').strip()
+    if first:
+        validate_member_name(first, 'First name')
+        request.user.first_name = first
+    if last:
+        validate_member_name(last, 'Last name')
+        request.user.last_name = last
+    if mobile:
+        # also update profile.mobile
+        mobile = normalize_mobile(mobile)
+        if MemberProfile.objects.filter(mobile=mobile).exclude(pk=profile.pk).exists():
+            raise ValidationError('Another member already uses this mobile number.')
+        profile.mobile = mobile
+    profile.gender = request.POST.get('gender', '').strip() or profile.gender
+    request.user.save()
+    profile.save()
+
+
+def _save_family_section(request, profile):
+    # validate mandatory fields first to avoid DB IntegrityError
+    kula = request.POST.get('kula_deity', '').strip()
+    if not kula:
+        raise ValidationError('Please fill Kula Deity before saving family details.')
+    reference = get_reference_data()
+    # FKs resolve against the cached reference rows, so saving needs no lookup query per field
+    profile.family_detail, _ = FamilyDetail.objects.update_or_create(profile=profile, defaults={
+        'father_name': request.POST.get('father_name', '').strip(),
+        'mother_name': request.POST.get('mother_name', '').strip(),
+        'siblings': request.POST.get('siblings', '').strip(),
+        'kula_deity': kula,
+        'caste': _reference_choice(reference['castes'], request.POST.get('caste')),
+        'koottam': _reference_choice(reference['koottams'], request.POST.get('koottam')),
+    })
+
+
+def _save_birth_section(request, profile):
+    reference = get_reference_data()
+    # parsed up front so the saved instance (and the returned fragment) holds date/time objects, not the raw strings
+    date_field, time_field = BirthDetail._meta.get_field('date_of_birth'), BirthDetail._meta.get_field('time_of_birth')
+    profile.birth_detail, _ = BirthDetail.objects.update_or_create(profile=profile, defaults={
+        'date_of_birth': date_field.to_python(request.POST.get('date_of_birth') or None),
+        'time_of_birth': time_field.to_python(request.POST.get('time_of_birth') or None),
+        'place_of_birth': request.POST.get('place_of_birth', '').strip(),
+        'rasi': _reference_choice(reference['rasis'], request.POST.get('rasi')),
+        'star': _reference_choice(reference['stars'], request.POST.get('star')),
+        'dhosam': _reference_choice(reference['dhosams'], request.POST.get('dhosam')),
+    })
+
+
+def _save_professional_section(request, profile):
+    reference = get_reference_data()
+    income = request.POST.get('monthly_income')
+    try:
+        income = int(income) if income else None
+    except ValueError:
+        income = None
+    profile.professional_detail, _ = ProfessionalDetail.objects.update_or_create(profile=profile, defaults={
+        'education': _reference_choice(reference['educations'], request.POST.get('education')),
+        'profession': _reference_choice(reference['professions'], request.POST.get('profession')),
+        'monthly_income': income,
+    })
+
+
+# section -> (save function, display fragment, success message, anchor on the profile page)
+PROFILE_SECTIONS = {
+    'member': (_save_member_section, 'main/_profile_member.html', 'Basic profile saved.', ''),
+    'family': (_save_family_section, 'main/_profile_family.html', 'Family details saved.', '#family-form'),
+    'birth': (_save_birth_section, 'main/_profile_birth.html', 'Birth details saved.', '#birth-form'),
+    'professional': (_save_professional_section, 'main/_profile_professional.html', 'Professional details saved.', '#prof-form'),
+}
+
+
+@login_required
+@require_POST
+def profile_section(request, section):
+    # JSON save of one profile section; returns the re-rendered section so the page updates without a reload
+    if section not in PROFILE_SECTIONS:
+        raise Http404('Unknown profile section.')
+    profile = _viewer_profile(request)
+    if profile is None:
+        return JsonResponse({'error': 'Profile not found.'}, status=404)
+    save, template, message, _ = PROFILE_SECTIONS[section]
+    try:
+        save(request, profile)
+    except ValidationError as exc:
+        return JsonResponse({'error': exc.messages[0]}, status=400)
+    html = render_to_string(template, {'profile': profile}, request=request)
+    return JsonResponse({'section': section, 'message': message, 'html': html})
 
 
 @login_required
@@ -215,126 +693,15 @@ def profile(request):
 
     if request.method == 'POST' and profile:
         section = request.POST.get('section')
-        if section == 'member':
-            # update user and basic profile
-            first = request.POST.get('first_name', '').strip()
-            last = request.POST.get('last_name', '').strip()
-            mobile = request.POST.get('mobile', '').strip()
-            gender = request.POST.get('gender', '').strip() or profile.gender
-
-            if first:
-                request.user.first_name = first
-            if last:
-                request.user.last_name = last
-            if mobile:
-                # also update profile.mobile
-                profile.mobile = mobile
-            profile.gender = gender
-            request.user.save()
-            profile.save()
-            messages.success(request, 'Basic profile saved.')
-            return redirect(reverse('profile'))
-        if section == 'family':
-            # validate mandatory fields first to avoid DB IntegrityError
-            kula = request.POST.get('kula_deity', '').strip()
-            if not kula:
-                messages.error(request, 'Please fill Kula Deity before saving family details.')
-                return redirect(reverse('profile') + '#family-form')
-
-            # safe create/update
-            fd, _ = FamilyDetail.objects.get_or_create(profile=profile)
-            # CharFields in FamilyDetail are not null=True; use empty string instead of None
-            fd.father_name = request.POST.get('father_name', '').strip() or ''
-            fd.mother_name = request.POST.get('mother_name', '').strip() or ''
-            fd.siblings = request.POST.get('siblings', '').strip() or ''
-            fd.kula_deity = kula or ''
-            caste_id = request.POST.get('caste')
-            if caste_id:
-                try:
-                    fd.caste = Caste.objects.get(pk=int(caste_id))
-                except (Caste.DoesNotExist, ValueError):
-                    fd.caste = None
-            else:
-                fd.caste = None
-            # save koottam FK if provided
-            koottam_id = request.POST.get('koottam')
-            if koottam_id:
-                try:
-                    fd.koottam = Koottam.objects.get(pk=int(koottam_id))
-                except (Koottam.DoesNotExist, ValueError):
-                    fd.koottam = None
-            else:
-                fd.koottam = None
-            fd.save()
-            messages.success(request, 'Family details saved.')
-            return redirect(reverse('profile') + '#family-form')
-
-        if section == 'birth':
-            bd, _ = BirthDetail.objects.get_or_create(profile=profile)
-            dob = request.POST.get('date_of_birth') or None
-            tob = request.POST.get('time_of_birth') or None
-            bd.date_of_birth = dob
-            bd.time_of_birth = tob
-            # place_of_birth is a CharField (blank=True) - store empty string if not provided
-            bd.place_of_birth = request.POST.get('place_of_birth', '').strip() or ''
-            rasi_id = request.POST.get('rasi')
-            if rasi_id:
-                try:
-                    bd.rasi = Rasi.objects.get(pk=int(rasi_id))
-                except (Rasi.DoesNotExist, ValueError):
-                    bd.rasi = None
-            else:
-                bd.rasi = None
-            # dhosam (new) - FK
-            dhosam_id = request.POST.get('dhosam')
-            if dhosam_id:
-                try:
-                    bd.dhosam = Dhosam.objects.get(pk=int(dhosam_id))
-                except (Dhosam.DoesNotExist, ValueError):
-                    bd.dhosam = None
-            else:
-                bd.dhosam = None
-            star_id = request.POST.get('star')
-            if star_id:
-                try:
-                    bd.star = Star.objects.get(pk=int(star_id))
-                except (Star.DoesNotExist, ValueError):
-                    bd.star = None
-            else:
-                bd.star = None
-            bd.save()
-            messages.success(request, 'Birth details saved.')
-            return redirect(reverse('profile') + '#birth-form')
-
-        if section == 'professional':
-            pd, _ = ProfessionalDetail.objects.get_or_create(profile=profile)
-            # education and profession (FKs)
-            edu_id = request.POST.get('education')
-            if edu_id:
-                try:
-                    pd.education = Education.objects.get(pk=int(edu_id))
-                except (Education.DoesNotExist, ValueError):
-                    pd.education = None
-            else:
-                pd.education = None
-
-            prof_id = request.POST.get('profession')
-            if prof_id:
-                try:
-                    pd.profession = Profession.objects.get(pk=int(prof_id))
-                except (Profession.DoesNotExist, ValueError):
-                    pd.profession = None
-            else:
-                pd.profession = None
-
-            income = request.POST.get('monthly_income')
+        if section in PROFILE_SECTIONS:
+            save, _, message, anchor = PROFILE_SECTIONS[section]
             try:
-                pd.monthly_income = int(income) if income else None
-            except ValueError:
-                pd.monthly_income = None
-            pd.save()
-            messages.success(request, 'Professional details saved.')
-            return redirect(reverse('profile') + '#prof-form')
+                save(request, profile)
+            except ValidationError as exc:
+                messages.error(request, exc.messages[0])
+            else:
+                messages.success(request, message)
+            return redirect(reverse('profile') + anchor)
 
         if section == 'reset_password':
             # change user's password after validating old password and confirmation
@@ -355,14 +722,8 @@ def profile(request):
             messages.success(request, 'Password changed. Please login with your new password.')
             return redirect('login')
 
-    # provide options for dropdowns
-    castes = Caste.objects.all()
-    rasis = Rasi.objects.all()
-    stars = Star.objects.all()
-    koottams = Koottam.objects.all()
-    dhosams = Dhosam.objects.all()
-    educations = Education.objects.all()
-    professions = Profession.objects.all()
+    # options for dropdowns come from the cached reference data (no queries unless it changed)
+    reference = get_reference_data()
     # compute date range for date of birth: between 50 years ago and 18 years ago
     today = date.today()
     try:
@@ -377,13 +738,7 @@ def profile(request):
 
     return render(request, 'main/profile.html', {
         'profile': profile,
-        'castes': castes,
-        'rasis': rasis,
-    'stars': stars,
-    'koottams': koottams,
-    'dhosams': dhosams,
-        'educations': educations,
-        'professions': professions,
+        **reference,
         'min_dob': min_dob.isoformat(),
         'max_dob': max_dob.isoformat(),
     })
@@ -392,14 +747,37 @@ def profile(request):
 @login_required
 def profile_detail(request, pk):
     # show read-only profile of another user (MemberProfile.pk)
-    profile = get_object_or_404(MemberProfile, pk=pk)
+    updated_at = MemberProfile.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        raise Http404('No MemberProfile matches the given query.')
+    key = profile_fragment_key(pk, updated_at)
+    details_html = cache.get(key)
+    if details_html is None:
+        profile = get_object_or_404(
+            MemberProfile.objects.select_related(
+                'user',
+                'birth_detail__rasi', 'birth_detail__star__rasi', 'birth_detail__dhosam',
+                'family_detail__caste', 'family_detail__koottam',
+                'professional_detail__education', 'professional_detail__profession',
+            ).prefetch_related(
+                Prefetch('photos', queryset=ProfilePhoto.objects.order_by('-is_primary', 'uploaded_at', 'pk'))
+            ),
+            pk=pk,
+        )
+        details_html = render_to_string('main/_profile_detail_body.html', {'profile': profile})
+        cache.set(key, details_html, PROFILE_FRAGMENT_TIMEOUT)
+    # favorite state is per viewer, so it stays outside the cached body
     show_favorite = False
     is_favorited = False
     if request.user.is_authenticated and hasattr(request.user, 'profile'):
-        me = request.user.profile
-        is_favorited = Shortlist.objects.filter(member=me, favorite=profile).exists()
-        show_favorite = (me != profile)
-    return render(request, 'main/profile_detail.html', {'profile': profile, 'show_favorite': show_favorite, 'is_favorited': is_favorited})
+        is_favorited = pk in _shortlisted_ids(request)
+        show_favorite = (request.user.profile.pk != pk)
+    return render(request, 'main/profile_detail.html', {
+        'profile_pk': pk,
+        'details_html': mark_safe(details_html),
+        'show_favorite': show_favorite,
+        'is_favorited': is_favorited,
+    })
 
 
 
@@ -419,7 +797,9 @@ def profile_photo_upload(request):
             messages.error(request, "Only JPEG and PNG allowed.")
             return redirect('profile')
         is_primary = profile.photos.count() == 0
-        ProfilePhoto.objects.create(profile=profile, image=photo, is_primary=is_primary)
+        profile_photo = ProfilePhoto.objects.create(profile=profile, image=photo, is_primary=is_primary)
+        # renditions are built by the background worker; pages serve the original until then
+        enqueue('alliance.imaging.process_photo', photo_id=profile_photo.pk)
         messages.success(request, "Photo uploaded.")
     return redirect('profile')
 
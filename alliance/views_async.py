@@ -0,0 +1,189 @@
+"""Async versions of the read-heavy member pages, for deployments under ASGI.
+
+``settings.ASYNC_VIEWS`` (env ``DJANGO_ASYNC_VIEWS=1``) routes matches,
+shortlisted, profile_detail and notifications here instead of to
+alliance.views; both share the query-building helpers in views.py, so the
+pages render the same.
+
+Each view resolves the member with ``request.auser()`` and issues its
+independent reads through ``asyncio.gather``. Django's async ORM still runs
+every query through ``sync_to_async`` on one thread per request, so gather
+interleaves the cache and database round trips rather than running queries
+in parallel; the gain is that the event loop keeps serving other requests
+(and the /events/ streams) while a page waits on I/O. Templates, forms and
+anything that may lazily touch the database are rendered via
+``sync_to_async`` too.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import Http404
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import (
+    MATCH_RANKING_TIMEOUT,
+    PROFILE_FRAGMENT_TIMEOUT,
+    get_shortlisted_ids,
+    match_ranking_key,
+    profile_fragment_key,
+)
+from .forms import PartnerSearchForm
+from .models import MemberProfile, Notification, ProfilePhoto
+from .pagination import akeyset_page, ranked_page
+from .views import (
+    NOTIFICATIONS_PAGE_SIZE,
+    RANKING_FIELDS,
+    _candidates,
+    _match_sort,
+    _matches_context,
+    _rank_matches,
+    _ranked_profiles,
+    _saved_search_filter,
+    _viewer_birth,
+)
+
+arender = sync_to_async(render)
+
+
+async def _viewer_profile(user):
+    """The member's profile with its birth details joined (None for staff without one)."""
+    return await MemberProfile.objects.select_related('birth_detail').filter(user=user).afirst()
+
+
+async def _shortlisted_ids(profile):
+    if profile is None:
+        return frozenset()
+    return await sync_to_async(get_shortlisted_ids)(profile.pk)
+
+
+async def _match_page(request, user, profile):
+    qs = _candidates(user, profile)
+    # the form's choices come from the reference data cache, which may need a query
+    form = await sync_to_async(PartnerSearchForm)(request.GET)
+    criteria = form.criteria() if await sync_to_async(form.is_valid)() else {}
+    if criteria:
+        qs = qs.matching_preferences(**criteria)
+    viewer = _viewer_birth(profile)
+    sort = _match_sort(request, viewer)
+    if sort == 'compatibility':
+        rows = [row async for row in qs.values_list(*RANKING_FIELDS)]
+        ranked = await sync_to_async(_rank_matches)(profile, viewer, rows)
+        # matches_feed serves the later pages from this ranking
+        key = await sync_to_async(match_ranking_key)(profile.pk, viewer, criteria)
+        await cache.aset(key, ranked, MATCH_RANKING_TIMEOUT)
+        entries, next_cursor = ranked_page(ranked)
+        by_pk = await qs.with_listing_photos().ain_bulk([pk for _, _, pk in entries])
+        profiles = _ranked_profiles(by_pk, entries)
+    else:
+        profiles, next_cursor = await akeyset_page(qs.with_listing_photos(), descending=True)
+    return {
+        'profiles': profiles,
+        'next_cursor': next_cursor,
+        'me_complete': bool(profile and profile.is_complete),
+        'sort': sort,
+        'form': form,
+    }
+
+
+async def _saved_searches(user, profile):
+    if profile is None:
+        return []
+    searches = [s async for s in profile.saved_searches.all()]
+    candidates = _candidates(user, profile)
+    querysets = await asyncio.gather(*(sync_to_async(_saved_search_filter)(candidates, s) for s in searches))
+    counts = await asyncio.gather(*(qs.acount() for qs in querysets))
+    for s, count in zip(searches, counts):
+        s.new_count = count
+    return searches
+
+
+@login_required
+async def matches(request):
+    user = await request.auser()
+    profile = await _viewer_profile(user)
+    page, saved_searches, shortlisted_ids = await asyncio.gather(
+        _match_page(request, user, profile),
+        _saved_searches(user, profile),
+        _shortlisted_ids(profile),
+    )
+    return await arender(request, 'main/matches.html', _matches_context(request, page, saved_searches, shortlisted_ids))
+
+
+@login_required
+async def shortlisted(request):
+    user = await request.auser()
+    profile = await _viewer_profile(user)
+    if profile is None:
+        raise Http404('No MemberProfile matches the given query.')
+    favorites = MemberProfile.objects.filter(favorited_by__member=profile).with_listing_photos()
+    profiles, shortlisted_ids = await asyncio.gather(
+        sync_to_async(list)(favorites),
+        _shortlisted_ids(profile),
+    )
+    return await arender(request, 'main/shortlisted.html', {'profiles': profiles, 'shortlisted_ids': shortlisted_ids})
+
+
+async def _profile_details_html(pk):
+    updated_at = await MemberProfile.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        raise Http404('No MemberProfile matches the given query.')
+    key = profile_fragment_key(pk, updated_at)
+    details_html = await cache.aget(key)
+    if details_html is None:
+        try:
+            profile = await MemberProfile.objects.select_related(
+                'user',
+                'birth_detail__rasi', 'birth_detail__star__rasi', 'birth_detail__dhosam',
+                'family_detail__caste', 'family_detail__koottam',
+                'professional_detail__education', 'professional_detail__profession',
+            ).prefetch_related(
+                Prefetch('photos', queryset=ProfilePhoto.objects.order_by('-is_primary', 'uploaded_at', 'pk'))
+            ).aget(pk=pk)
+        except MemberProfile.DoesNotExist:
+            raise Http404('No MemberProfile matches the given query.')
+        details_html = await sync_to_async(render_to_string)('main/_profile_detail_body.html', {'profile': profile})
+        await cache.aset(key, details_html, PROFILE_FRAGMENT_TIMEOUT)
+    return details_html
+
+
+@login_required
+async def profile_detail(request, pk):
+    user = await request.auser()
+    details_html, profile = await asyncio.gather(
+        _profile_details_html(pk),
+        MemberProfile.objects.filter(user=user).only('pk').afirst(),
+    )
+    shortlisted_ids = await _shortlisted_ids(profile)
+    return await arender(request, 'main/profile_detail.html', {
+        'profile_pk': pk,
+        'details_html': mark_safe(details_html),
+        'show_favorite': profile is not None and profile.pk != pk,
+        'is_favorited': pk in shortlisted_ids,
+    })
+
+
+@login_required
+async def notifications(request):
+    cursor = request.GET.get('cursor')
+    user = await request.auser()
+    profile = await MemberProfile.objects.filter(user=user).only('pk', 'notifications_seen_at').afirst()
+    if profile:
+        inbox = Notification.objects.for_member(profile.pk)
+    else:
+        inbox = Notification.objects.filter(is_targeted=False)
+    try:
+        items, next_cursor = await akeyset_page(inbox, cursor, NOTIFICATIONS_PAGE_SIZE, descending=True, field='published_at')
+    except ValueError:
+        cursor = None
+        items, next_cursor = await akeyset_page(inbox, None, NOTIFICATIONS_PAGE_SIZE, descending=True, field='published_at')
+    seen_at = profile.notifications_seen_at if profile else None
+    for n in items:
+        n.is_unread = profile is not None and (seen_at is None or n.published_at > seen_at)
+    if profile and not cursor and items and (seen_at is None or items[0].published_at > seen_at):
+        await MemberProfile.objects.filter(pk=profile.pk).aupdate(notifications_seen_at=items[0].published_at)
+    return await arender(request, 'main/notifications.html', {'notifications': items, 'next_cursor': next_cursor})
@@ -2,6 +2,8 @@
 ASGI config for digimat project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn digimat.asgi:application``) to use
+the Server-Sent Events stream at /events/; under WSGI the stream cannot be held open.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -62,6 +62,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'alliance.context_processors.notifications',
             ],
         },
     },
@@ -73,12 +74,124 @@ WSGI_APPLICATION = 'digimat.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DJANGO_DB_ENGINE=postgresql uses DJANGO_DB_NAME / _USER / _PASSWORD / _HOST / _PORT;
+# anything else keeps the SQLite file (DJANGO_SQLITE_PATH, default db.sqlite3).
+
+if os.environ.get('DJANGO_DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'digimat'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'digimat'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            # persistent connections, checked before reuse so a restarted server is not an error
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if os.environ.get('DJANGO_DB_POOL') == '1':
+        # psycopg 3 connection pool (pip install "psycopg[binary,pool]"); replaces persistent connections
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN', '2')),
+            'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX', '10')),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # wait up to 20s for a competing writer instead of failing with "database is locked"
+                'timeout': 20,
+                # take the write lock when a transaction starts, so two writers never deadlock upgrading read locks
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+    # WAL is on by default only for a database given by DJANGO_SQLITE_PATH: the journal mode is stored in the file,
+    # and the repository's db.sqlite3 is tracked, so switching it would leave every checkout modified
+    if os.environ.get('DJANGO_SQLITE_WAL', '1' if 'DJANGO_SQLITE_PATH' in os.environ else '0') == '1':
+        # readers no longer block the writer; NORMAL sync is durable in WAL mode except across power loss
+        DATABASES['default']['OPTIONS']['init_command'] = (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA mmap_size=134217728;'
+            'PRAGMA busy_timeout=20000;'
+        )
+    else:
+        # the journal mode is stored in the database file, so switching back has to be explicit
+        DATABASES['default']['OPTIONS']['init_command'] = 'PRAGMA journal_mode=DELETE;'
+
+# Optional read replica (DJANGO_DB_REPLICA_HOST, or DJANGO_SQLITE_REPLICA_PATH to try it with a copy of the
+# SQLite file): safe requests read from it, see alliance/routers.py. Tests mirror it onto the primary.
+_replica = {}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and os.environ.get('DJANGO_DB_REPLICA_HOST'):
+    _replica = {
+        'HOST': os.environ['DJANGO_DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DJANGO_DB_REPLICA_PORT', DATABASES['default']['PORT']),
+    }
+elif DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and os.environ.get('DJANGO_SQLITE_REPLICA_PATH'):
+    _replica = {'NAME': os.environ['DJANGO_SQLITE_REPLICA_PATH']}
+if _replica:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        **_replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['alliance.routers.PrimaryReplicaRouter']
+    # outermost after security, so sessions and authentication are routed per request too
+    MIDDLEWARE.insert(1, 'alliance.middleware.read_your_writes')
+# how long a member's reads stay on the primary after they change something
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DJANGO_DB_REPLICA_STICKY_SECONDS', '10'))
+
+
+# Cache tier shared by sessions and alliance.caching (reference data, profile fragments, shortlists,
+# unread counters). DJANGO_CACHE_URL selects it:
+#   unset                -> local memory, private to each process (fine for runserver / a single worker)
+#   file:///var/cache/x  -> files shared by the workers of one host
+#   redis://host:6379/1  -> Redis or a compatible server (needs the redis package)
+# With several workers use a shared tier, otherwise one worker's invalidations are invisible to the others.
+
+CACHE_URL = os.environ.get('DJANGO_CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'digimat',
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'digimat',
+            # fragments, shortlist sets and counters outgrow the default 300 entries quickly
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Sessions are read from the cache and written through to the database ("cached_db") once the cache is
+# shared; a per-process cache could serve a logged-out session from another worker, so it keeps "db".
+# DJANGO_SESSION_ENGINE=db|cached_db|cache overrides; "cache" drops the table entirely but loses
+# sessions whenever the cache is flushed.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get(
+    'DJANGO_SESSION_ENGINE', 'cached_db' if CACHE_URL else 'db'
+)
 
 
 # Password validation
@@ -126,6 +239,21 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# Matches ranked by porutham hide candidates scoring below this (out of 10)
+PORUTHAM_MIN_SCORE = 5
+
+# Real-time events (alliance.events); the SSE endpoint needs the ASGI application
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', 'alliance.events.InProcessBroker')
+# defaults to the cache tier's Redis when there is one
+EVENTS_REDIS_URL = os.environ.get(
+    'EVENTS_REDIS_URL', CACHE_URL if CACHE_URL.startswith(('redis://', 'rediss://')) else 'redis://localhost:6379/0'
+)
+EVENTS_HEARTBEAT = 25
+
+# Serve matches, shortlisted, profile detail and notifications from alliance/views_async.py;
+# only worthwhile when running under an ASGI server (see digimat/asgi.py).
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 